@@ -1,5 +1,17 @@
 from django.contrib import admin
-from .models import Post, Comment, Profile
+from . import moderation
+from .models import Post, Comment, Profile, MediaJob
+
+
+class MediaJobInline(admin.TabularInline):
+    model = MediaJob
+    extra = 0
+    can_delete = False
+    fields = ['kind', 'source_name', 'status', 'attempts', 'error', 'created_at', 'finished_at']
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Post)
@@ -9,15 +21,41 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content']
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
+    list_select_related = ['author']
+    inlines = [MediaJobInline]
+
+
+@admin.register(MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ['source_name', 'kind', 'post', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    list_select_related = ['post']
+    readonly_fields = ['post', 'kind', 'source_name', 'attempts', 'error', 'created_at', 'started_at', 'finished_at']
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ['post', 'author', 'created_at', 'is_approved']
+    list_select_related = ['post', 'author']
     list_filter = ['is_approved', 'created_at']
     search_fields = ['content', 'author__username', 'post__title']
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
+    actions = ['approve_comments', 'unapprove_comments']
+
+    @admin.action(description="Approuver les commentaires sélectionnés")
+    def approve_comments(self, request, queryset):
+        count = moderation.set_approval(queryset, True)
+        self.message_user(request, f"{count} commentaire(s) approuvé(s).")
+
+    @admin.action(description="Désapprouver les commentaires sélectionnés")
+    def unapprove_comments(self, request, queryset):
+        count = moderation.set_approval(queryset, False)
+        self.message_user(request, f"{count} commentaire(s) désapprouvé(s).")
+
+    def delete_queryset(self, request, queryset):
+        # Action « Supprimer » : un seul DELETE, compteurs ajustés en bloc
+        moderation.delete_comments(queryset)
 
 
 @admin.register(Profile)
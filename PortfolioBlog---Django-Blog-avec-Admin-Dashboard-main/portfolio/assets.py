@@ -0,0 +1,121 @@
+"""Service des fichiers statiques collectés (STATIC_ROOT).
+
+`StaticAssetsMiddleware` répond aux URLs de STATIC_URL avant les
+middlewares de session et d'authentification. La variante précompressée
+(.br, .gz : voir storage.PrecompressedManifestStorage) est choisie selon
+Accept-Encoding ; les noms avec empreinte sont mis en cache un an,
+`immutable`. Un fichier absent de STATIC_ROOT est laissé aux vues suivantes.
+"""
+import mimetypes
+import os
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .mediafiles import DEFAULT_MAX_AGE, IMMUTABLE_MAX_AGE
+from .storage import COMPRESSIBLE_EXTENSIONS, is_hashed_name, precompressed_variants
+
+
+def accepted_encodings(header):
+    """Encodages acceptés par le client (q=0 exclu)"""
+    accepted = set()
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        if params.replace(' ', '').lower() in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+def serve_asset(request, name):
+    """Réponse pour le fichier statique `name`, ou None s'il n'existe pas"""
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+
+    encoding = None
+    compressible = os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+    if compressible:
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for candidate, suffix in precompressed_variants():
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+
+    stat = os.stat(path)
+    etag = quote_etag(f'{stat.st_size:x}-{stat.st_mtime_ns:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        del response['Content-Disposition']  # nom du fichier .gz/.br, inutile ici
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if compressible:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if is_hashed_name(name):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=DEFAULT_MAX_AGE)
+    return response
+
+
+class StaticAssetsMiddleware:
+    """Sert STATIC_ROOT sous STATIC_URL (à placer juste après SecurityMiddleware)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else None
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _asset_name(self, request):
+        if self.prefix and request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            return request.path[len(self.prefix):]
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        name = self._asset_name(request)
+        response = serve_asset(request, name) if name else None
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        name = self._asset_name(request)
+        response = await sync_to_async(serve_asset)(request, name) if name else None
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+
+def compression_report(root=None):
+    """Une ligne par fichier texte de STATIC_ROOT : taille d'origine et des variantes"""
+    root = root or settings.STATIC_ROOT
+    rows = []
+    for directory, _, files in os.walk(root):
+        for filename in sorted(files):
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(directory, filename)
+            row = {'name': os.path.relpath(path, root), 'size': os.path.getsize(path)}
+            for encoding, suffix in precompressed_variants():
+                row[encoding] = os.path.getsize(path + suffix) if os.path.exists(path + suffix) else None
+            rows.append(row)
+    rows.sort(key=lambda row: row['name'])
+    return rows
@@ -0,0 +1,108 @@
+"""Versions async des pages publiques, utilisées sous ASGI (urls_async.py).
+
+Les requêtes passent par l'ORM async (aiterator, aget, acount). Tout ce que
+les templates lisent est chargé avant le rendu : un accès paresseux à la
+base pendant le rendu lèverait SynchronousOnlyOperation.
+"""
+import os
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import aget_object_or_404, redirect, render
+
+from . import mediafiles, search
+from .caching import cache_public_page
+from .conditional import conditional_page, listing_validators, post_validators
+from .forms import CommentForm
+from .models import Post, SiteConfig
+from .pagination import apaginate
+from .views import LISTING_DEFERRED
+
+
+async def _load_user(request):
+    # Les context processors lisent request.user de façon synchrone
+    request.user = await request.auser()
+    return request.user
+
+
+@conditional_page(listing_validators)
+@cache_public_page('listing')
+async def home(request):
+    """Page d'accueil avec les derniers posts"""
+    await _load_user(request)
+    recent_posts = [
+        post async for post in
+        Post.objects.filter(is_published=True).order_by('-created_at', '-id').defer(*LISTING_DEFERRED)[:3].aiterator()
+    ]
+
+    context = {
+        'recent_posts': recent_posts,
+        'page_title': 'Accueil'
+    }
+    return render(request, 'portfolio/home.html', context)
+
+
+@conditional_page(listing_validators)
+@cache_public_page('listing')
+async def blog(request):
+    """Page blog avec tous les posts"""
+    await _load_user(request)
+    search_query = request.GET.get('search', '')
+
+    if search_query:
+        # Requêtes SQL brutes sur l'index plein texte : exécutées dans un thread
+        posts = await sync_to_async(search.search_page)(request, search_query, 6)
+    else:
+        posts = Post.objects.filter(is_published=True).select_related('author').defer(*LISTING_DEFERRED)
+        posts = await apaginate(request, posts, 6, with_count=True)
+
+    context = {
+        'posts': posts,
+        'search_query': search_query,
+        'page_title': 'Blog'
+    }
+    return render(request, 'portfolio/blog.html', context)
+
+
+@conditional_page(post_validators)
+@cache_public_page('post:{pk}')
+async def post_detail(request, pk):
+    """Détail d'un post avec commentaires"""
+    user = await _load_user(request)
+    post = await aget_object_or_404(Post.objects.select_related('author'), pk=pk, is_published=True)
+    comments = [
+        comment async for comment in
+        post.comments.filter(is_approved=True).select_related('author').aiterator()
+    ]
+
+    if request.method == 'POST' and user.is_authenticated:
+        form = CommentForm(request.POST)
+        if form.is_valid():
+            comment = form.save(commit=False)
+            comment.post = post
+            comment.author = user
+            await comment.asave()
+            messages.success(request, 'Votre commentaire a été ajouté avec succès!')
+            return redirect('post_detail', pk=pk)
+    else:
+        form = CommentForm()
+
+    context = {
+        'post': post,
+        'comments': comments,
+        'form': form,
+        'page_title': post.title
+    }
+    return render(request, 'portfolio/post_detail.html', context)
+
+
+async def download_cv(request):
+    """Envoie le CV ou informe si indisponible"""
+    config = await sync_to_async(SiteConfig.get_solo)()
+    if config.cv:
+        filename = 'CV' + os.path.splitext(config.cv.name)[1]
+        return await sync_to_async(mediafiles.serve_file)(
+            request, config.cv.name, max_age=0, filename=filename, asynchronous=True
+        )
+    messages.warning(request, 'Le CV n\'est pas encore disponible.')
+    return redirect('home')
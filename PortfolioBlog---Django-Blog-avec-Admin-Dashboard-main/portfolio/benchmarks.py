@@ -0,0 +1,209 @@
+"""Outils partagés par les commandes de benchmark.
+
+Les mesures tournent toujours sur une base de test jetable : db.sqlite3
+n'est jamais modifiée. Seule la commande seed_benchmark_data écrit dans la
+base configurée (DJANGO_DB_NAME pour en choisir une autre).
+"""
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment,
+)
+from django.utils import timezone
+
+from . import counters, search
+from .models import Comment, Post
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, "
+    "quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo. "
+)
+TOPICS = ['Django', 'Python', 'Réseaux', 'Données', 'Sécurité', 'Cloud', 'Mobile', 'Spring']
+
+
+@contextmanager
+def temporary_database(use_cache=False):
+    """Crée une base de test vide le temps du benchmark.
+
+    Le cache est désactivé par défaut pour mesurer le rendu réel des pages ;
+    avec `use_cache`, un cache mémoire isolé remplace celui du site.
+    """
+    backend = 'locmem.LocMemCache' if use_cache else 'dummy.DummyCache'
+    caches = {
+        'default': {'BACKEND': f'django.core.cache.backends.{backend}', 'LOCATION': 'bench'},
+        # Toujours un vrai cache : le profil de sessions 'cache' en dépend
+        'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-sessions'},
+    }
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(CACHES=caches):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def get_bench_author():
+    author, _ = User.objects.get_or_create(
+        username='bench', defaults={'is_staff': True, 'is_superuser': True}
+    )
+    return author
+
+
+def seed_posts(count, author=None, paragraphs=20, batch_size=1000):
+    """Ajoute `count` posts publiés avec un contenu volumineux (bulk_create)"""
+    author = author or get_bench_author()
+    now = timezone.now()
+    content = (LOREM * 4 + "\n\n") * paragraphs
+    start = Post.objects.count()
+    posts = [
+        Post(
+            title=f"{TOPICS[(start + i) % len(TOPICS)]} : article de test {start + i}",
+            content=content,
+            video_url='https://www.youtube.com/watch?v=oYUszFIXdfg' if i % 3 == 0 else None,
+            media_type='video' if i % 3 == 0 else None,
+            author=author,
+            created_at=now - timezone.timedelta(minutes=start + i),
+        )
+        for i in range(count)
+    ]
+    # bulk_create n'appelle pas save() : rendu HTML, extrait et vidéo calculés ici
+    for post in posts:
+        post.render_content()
+        post.set_video_metadata()
+    Post.objects.bulk_create(posts, batch_size=batch_size)
+
+
+def _bench_image(rng, size):
+    """JPEG synthétique (rectangles aléatoires), reproductible pour un même `rng`"""
+    image = Image.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        box = (x, y, x + rng.randrange(20, size[0] // 2), y + rng.randrange(20, size[1] // 2))
+        draw.rectangle(box, fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def _video_url(rng):
+    video_id = ''.join(rng.choices('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-', k=11))
+    return rng.choice([f'https://www.youtube.com/watch?v={video_id}', f'https://youtu.be/{video_id}'])
+
+
+def seed_benchmark_data(users=50, posts=500, comments=5000, image_ratio=0.2, video_ratio=0.3,
+                        draft_ratio=0.1, pending_ratio=0.15, image_size=(1200, 800), seed=42, batch_size=1000):
+    """Jeu de données réaliste et reproductible (même `seed`, mêmes données).
+
+    - quelques auteurs (staff) écrivent les articles, étalés sur deux ans ;
+    - longueur des articles en loi log-normale (quelques très longs) ;
+    - commentaires concentrés sur peu d'articles et de lecteurs (loi de Zipf),
+      plus nombreux sur les articles récents ;
+    - images JPEG écrites dans MEDIA_ROOT, vidéos YouTube sous deux formes d'URL.
+    Les compteurs et l'index de recherche sont recalculés à la fin.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(None)  # comptes sans mot de passe utilisable, pas de hachage coûteux
+    start = User.objects.count()
+    User.objects.bulk_create([
+        User(username=f'lecteur{start + i}', password=password, is_staff=i < 3,
+             date_joined=now - timezone.timedelta(days=rng.randrange(730)))
+        for i in range(users)
+    ], batch_size=batch_size)
+    accounts = list(User.objects.order_by('-pk').values_list('pk', flat=True)[:users])[::-1]
+    authors = accounts[:3]
+
+    new_posts = []
+    for i in range(posts):
+        paragraphs = max(1, min(60, round(rng.lognormvariate(1.8, 0.7))))
+        kind = rng.random()
+        post = Post(
+            title=f"{rng.choice(TOPICS)} : {' '.join(rng.sample(LOREM.split(), 5))}",
+            content=(LOREM * rng.randint(1, 4) + "\n\n") * paragraphs,
+            author_id=rng.choice(authors),
+            created_at=now - timezone.timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)),
+            is_published=rng.random() >= draft_ratio,
+        )
+        if kind < image_ratio:
+            post.media = default_storage.save(f'posts_media/bench_{i}.jpg',
+                                              ContentFile(_bench_image(rng, image_size)))
+            post.media_type = 'image'
+        elif kind < image_ratio + video_ratio:
+            post.video_url = _video_url(rng)
+            post.media_type = 'video'
+            post.set_video_metadata()
+        post.render_content()
+        new_posts.append(post)
+    Post.objects.bulk_create(new_posts, batch_size=batch_size)
+
+    # Plus un article est récent et haut placé, plus il est commenté
+    recent = list(Post.objects.filter(is_published=True).order_by('-created_at').values_list('pk', 'created_at')[:posts])
+    post_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(recent))]
+    reader_weights = [1 / (rank + 1) for rank in range(len(accounts))]
+    new_comments = []
+    if recent:
+        for post_id, created_at in rng.choices(recent, weights=post_weights, k=comments):
+            age = (now - created_at).total_seconds()
+            new_comments.append(Comment(
+                post_id=post_id,
+                author_id=rng.choices(accounts, weights=reader_weights)[0],
+                content=' '.join(rng.sample(LOREM.split(), rng.randint(5, 30))),
+                created_at=created_at + timezone.timedelta(seconds=rng.random() * age),
+                is_approved=rng.random() >= pending_ratio,
+            ))
+    Comment.objects.bulk_create(new_comments, batch_size=batch_size)
+
+    # bulk_create ne déclenche pas les signaux
+    totals = counters.reconcile()
+    search.rebuild_index()
+    return {'users': users, 'posts': posts, 'comments': len(new_comments), **totals}
+
+
+def peak_memory(func):
+    """Pic d'allocations Python (octets) pendant un appel de `func`"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(func, repeat=20, memory=False):
+    """Appelle `func` et retourne latence médiane/p95 (ms) et nombre de requêtes SQL.
+
+    Avec `memory`, ajoute le pic d'allocations d'un appel (`peak_kib`, tracemalloc).
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        func()  # échauffement + comptage des requêtes
+    queries = len(ctx.captured_queries)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    result = {
+        'median_ms': timings[len(timings) // 2],
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'queries': queries,
+    }
+    if memory:
+        result['peak_kib'] = peak_memory(func) / 1024
+    return result
@@ -0,0 +1,146 @@
+"""Cache des pages publiques avec invalidation par générations.
+
+Chaque page dépend de « scopes » (`listing` pour l'accueil et le blog,
+`post:<pk>` pour un article). La clé d'une page contient la génération
+courante de ses scopes : invalider un scope revient à incrémenter sa
+génération, les anciennes entrées expirent d'elles-mêmes.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+
+PAGE_CACHE_TIMEOUT = 60 * 15  # secondes
+# Plus long que toute entrée qui en dépend (pages, fragments, sitemaps : 24 h
+# au plus) ; une génération expirée repart d'un nouvel horodatage. Fini pour
+# que les scopes demandés par des URL arbitraires (404) ne restent pas à vie.
+GENERATION_TIMEOUT = 60 * 60 * 24 * 2
+
+
+def _generation_key(scope):
+    return f'gen:{scope}'
+
+
+def _new_generation():
+    # Horodatage plutôt que 1 : si une génération est évincée du cache, la
+    # nouvelle valeur ne peut pas retomber sur d'anciennes entrées
+    return int(time.time() * 1000)
+
+
+def get_generations(scopes):
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, GENERATION_TIMEOUT)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def peek_generations(scopes):
+    """Comme get_generations, sans créer les générations absentes (0)"""
+    found = cache.get_many([_generation_key(scope) for scope in scopes])
+    return [found.get(_generation_key(scope), 0) for scope in scopes]
+
+
+def invalidate(*scopes):
+    """Invalide toutes les pages dépendant de ces scopes"""
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+            # incr ne prolonge pas (ou réinitialise, selon le backend) la durée de vie
+            cache.touch(key, GENERATION_TIMEOUT)
+        except ValueError:
+            cache.set(key, _new_generation(), GENERATION_TIMEOUT)
+
+
+def page_key(view_name, request, scopes):
+    generations = '.'.join(str(gen) for gen in get_generations(scopes))
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    # Seules les pages anonymes sont mises en cache : l'état d'authentification fait partie de la clé
+    return f'page:{view_name}:anon:{generations}:{path}'
+
+
+def record(view_name, outcome):
+    key = f'stats:{view_name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def cache_stats(view_names=('home', 'blog', 'post_detail')):
+    """Compteurs hit/miss par vue, pour le dashboard"""
+    keys = [f'stats:{name}:{outcome}' for name in view_names for outcome in ('hit', 'miss')]
+    values = cache.get_many(keys)
+    stats = []
+    for name in view_names:
+        hits = values.get(f'stats:{name}:hit', 0)
+        misses = values.get(f'stats:{name}:miss', 0)
+        total = hits + misses
+        stats.append({
+            'view': name,
+            'hits': hits,
+            'misses': misses,
+            'ratio': round(100 * hits / total) if total else None,
+        })
+    return stats
+
+
+def is_public_request(request):
+    """Requête GET anonyme sans message flash : la réponse est la même pour tous"""
+    if request.method != 'GET' or request.user.is_authenticated:
+        return False
+    # Une page affichant des messages flash ne doit pas être resservie
+    return not any(True for _ in get_messages(request))
+
+
+def _lookup(request, view_name, scopes, kwargs):
+    """(clé, réponse en cache) ; clé None si la requête ne doit pas être mise en cache"""
+    if not is_public_request(request):
+        return None, None
+    key = page_key(view_name, request, [scope.format(**kwargs) for scope in scopes])
+    response = cache.get(key)
+    record(view_name, 'miss' if response is None else 'hit')
+    return key, response
+
+
+def _store(key, response, timeout):
+    if response.status_code == 200 and not response.cookies:
+        cache.set(key, response, timeout)
+
+
+def cache_public_page(*scopes, timeout=PAGE_CACHE_TIMEOUT):
+    """Met en cache la réponse d'une vue publique pour les visiteurs anonymes.
+
+    Les scopes peuvent utiliser les paramètres de l'URL, ex: 'post:{pk}'.
+    Accepte aussi les vues async (le cache est consulté dans un thread).
+    """
+    def decorator(view):
+        view_name = view.__name__
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key, response = await sync_to_async(_lookup)(request, view_name, scopes, kwargs)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    if key is not None:
+                        await sync_to_async(_store)(key, response, timeout)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, response = _lookup(request, view_name, scopes, kwargs)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if key is not None:
+                    _store(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,138 @@
+"""Requêtes conditionnelles (ETag / Last-Modified) des pages publiques.
+
+Chaque fonction de validation lit quelques colonnes et retourne
+(etag, last_modified), ou None si la ressource n'existe pas. Si le client
+possède déjà cette version, la vue n'est pas appelée : réponse 304 sans
+rendu de template ni requête principale.
+
+L'ETag contient aussi les générations de cache de la page (renommage d'un
+auteur, commentaire modifié...) et l'empreinte des templates et fichiers
+statiques déployés : toute invalidation du cache de pages change l'ETag.
+"""
+import hashlib
+import os
+from calendar import timegm
+from functools import cache, wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db.models import Subquery
+from django.template import engines
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .caching import is_public_request, peek_generations
+from .fragments import FRAGMENT_SCOPE
+from .models import Post, SiteStats
+
+
+def _stamp(value):
+    return f'{value.timestamp():.6f}' if value else '0'
+
+
+def _latest(*values):
+    return max((value for value in values if value), default=None)
+
+
+def _newest(field):
+    """Valeur la plus récente de `field`, lue en bout d'index (pas de parcours de table)"""
+    return Subquery(
+        Post.objects.filter(**{f'{field}__isnull': False}).order_by(f'-{field}').values(field)[:1]
+    )
+
+
+@cache
+def deploy_version():
+    """Empreinte des templates et du manifeste des fichiers statiques (une fois par processus)"""
+    digest = hashlib.md5(getattr(staticfiles_storage, 'manifest_hash', '').encode())
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, dirs, files in os.walk(directory):
+                dirs.sort()
+                for name in sorted(files):
+                    with open(os.path.join(root, name), 'rb') as template:
+                        digest.update(template.read())
+    return digest.hexdigest()[:8]
+
+
+def _version(*scopes):
+    generations = '.'.join(str(generation) for generation in peek_generations(scopes))
+    return f'{generations}-{deploy_version()}'
+
+
+def listing_validators(*args, **kwargs):
+    """Accueil, blog et sitemap : dernier article modifié, commenté, supprimé ou dépublié"""
+    row = (
+        SiteStats.objects.filter(pk=1)
+        .values_list('total_posts', 'listing_changed_at', _newest('updated_at'), _newest('last_activity_at'))
+        .first()
+    )
+    count, removed, updated, activity = row or (None, None, None, None)
+    etag = (f"posts-{count}-{_stamp(removed)}-{_stamp(updated)}-{_stamp(activity)}"
+            f"-{_version('listing', FRAGMENT_SCOPE)}")
+    return etag, _latest(removed, updated, activity)
+
+
+def post_validators(pk, **kwargs):
+    """Détail d'un article : l'article lui-même et son dernier commentaire"""
+    row = (
+        Post.objects.filter(pk=pk, is_published=True)
+        .values_list('updated_at', 'last_activity_at', 'approved_comment_count')
+        .first()
+    )
+    if row is None:
+        return None
+    updated, activity, comments = row
+    etag = f"post-{pk}-{comments}-{_stamp(updated)}-{_stamp(activity)}-{_version(f'post:{pk}', FRAGMENT_SCOPE)}"
+    return etag, _latest(updated, activity)
+
+
+def _check(request, validators, args, kwargs):
+    """(etag, timestamp, réponse 304 ou None), ou None si la page n'est pas concernée"""
+    if not is_public_request(request):
+        return None
+    found = validators(*args, **kwargs)
+    if found is None:
+        return None
+    etag, last_modified = found
+    etag = quote_etag(etag)
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    return etag, timestamp, get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def _add_validators(response, etag, timestamp):
+    response.headers.setdefault('ETag', etag)
+    if timestamp is not None:
+        response.headers.setdefault('Last-Modified', http_date(timestamp))
+    # Toujours revalider : une fois connecté, la même URL sert une autre page
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def conditional_page(validators):
+    """Ajoute ETag et Last-Modified aux réponses anonymes et répond 304 si possible"""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                state = await sync_to_async(_check)(request, validators, args, kwargs)
+                if state is None:
+                    return await view(request, *args, **kwargs)
+                etag, timestamp, response = state
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _add_validators(response, etag, timestamp)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            state = _check(request, validators, args, kwargs)
+            if state is None:
+                return view(request, *args, **kwargs)
+            etag, timestamp, response = state
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _add_validators(response, etag, timestamp)
+        return wrapper
+    return decorator
@@ -0,0 +1,9 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import SiteConfig
+
+
+def site_config(request):
+    """`site_config` dans tous les templates, chargé seulement s'il est utilisé
+    (sans requête SQL tant que la configuration n'a pas changé)"""
+    return {'site_config': SimpleLazyObject(SiteConfig.get_solo)}
@@ -0,0 +1,154 @@
+"""Compteurs dénormalisés : commentaires par article et statistiques globales.
+
+Les mises à jour sont des UPDATE ... SET x = x + n (sans lecture préalable),
+appelés par les signaux de Post et Comment dans la transaction de l'écriture.
+`reconcile()` (commande reconcile_counters) recalcule tout en cas de dérive.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Comment, Post, SiteStats
+
+
+def _update_stats(**changes):
+    """UPDATE de la ligne SiteStats. Ligne absente (base neuve, ligne supprimée) :
+    recalculée depuis les tables après le commit, une fois l'écriture terminée
+    (une suppression en cascade envoie encore d'autres signaux)"""
+    if SiteStats.objects.filter(pk=1).update(**changes):
+        return
+    # Les deltas seront comptés par reconcile() ; seules les dates restent à poser
+    stamps = {name: value for name, value in changes.items() if not hasattr(value, 'resolve_expression')}
+    transaction.on_commit(lambda: _rebuild_stats(stamps))
+
+
+def _rebuild_stats(stamps):
+    if not SiteStats.objects.filter(pk=1).exists():
+        reconcile()
+    if stamps:
+        SiteStats.objects.filter(pk=1).update(**stamps)
+
+
+def _comment_deltas(is_approved, sign):
+    return (sign, 0) if is_approved else (0, sign)
+
+
+def update_comment_counters(post_id, approved=0, pending=0, touch=True):
+    """Ajoute les deltas aux compteurs du post et aux statistiques globales"""
+    changes = {}
+    if approved:
+        changes['approved_comment_count'] = F('approved_comment_count') + approved
+    if pending:
+        changes['pending_comment_count'] = F('pending_comment_count') + pending
+    if touch:
+        changes['last_activity_at'] = timezone.now()
+    if changes:
+        Post.objects.filter(pk=post_id).update(**changes)
+    if approved or pending:
+        _update_stats(
+            total_comments=F('total_comments') + approved + pending,
+            pending_comments=F('pending_comments') + pending,
+        )
+
+
+def apply_comment_deltas(deltas, batch_size=500):
+    """Version ensembliste de update_comment_counters : {post_id: [approved, pending]}.
+
+    Un UPDATE par lot de posts (CASE par post) et un seul pour SiteStats.
+    """
+    post_ids = list(deltas)
+    now = timezone.now()
+    for start in range(0, len(post_ids), batch_size):
+        batch = post_ids[start:start + batch_size]
+
+        def per_post(index):
+            return Case(*[When(pk=pk, then=Value(deltas[pk][index])) for pk in batch], default=Value(0))
+
+        Post.objects.filter(pk__in=batch).update(
+            approved_comment_count=F('approved_comment_count') + per_post(0),
+            pending_comment_count=F('pending_comment_count') + per_post(1),
+            last_activity_at=now,
+        )
+    approved = sum(delta[0] for delta in deltas.values())
+    pending = sum(delta[1] for delta in deltas.values())
+    if approved or pending:
+        _update_stats(
+            total_comments=F('total_comments') + approved + pending,
+            pending_comments=F('pending_comments') + pending,
+        )
+
+
+def comment_saved(comment, created):
+    previous_post, previous_approved = getattr(comment, '_loaded_state', (None, None))
+    if created or previous_post is None:
+        update_comment_counters(comment.post_id, *_comment_deltas(comment.is_approved, 1))
+    elif previous_post != comment.post_id:
+        update_comment_counters(previous_post, *_comment_deltas(previous_approved, -1))
+        update_comment_counters(comment.post_id, *_comment_deltas(comment.is_approved, 1))
+    elif previous_approved != comment.is_approved:
+        sign = 1 if comment.is_approved else -1
+        update_comment_counters(comment.post_id, approved=sign, pending=-sign)
+    else:
+        # Contenu modifié : seule la date d'activité change (validateurs HTTP du post)
+        update_comment_counters(comment.post_id)
+    comment._loaded_state = (comment.post_id, comment.is_approved)
+
+
+def comment_deleted(comment):
+    update_comment_counters(comment.post_id, *_comment_deltas(comment.is_approved, -1))
+
+
+def post_saved(post, created):
+    published = 1 if post.is_published else 0
+    if created:
+        _update_stats(
+            total_posts=F('total_posts') + 1,
+            published_posts=F('published_posts') + published,
+        )
+    else:
+        previous = getattr(post, '_loaded_is_published', None)
+        if previous is not None and previous != post.is_published:
+            changes = {'published_posts': F('published_posts') + (1 if post.is_published else -1)}
+            if not post.is_published:
+                changes['listing_changed_at'] = timezone.now()
+            _update_stats(**changes)
+    post._loaded_is_published = post.is_published
+
+
+def post_deleted(post):
+    _update_stats(
+        total_posts=F('total_posts') - 1,
+        published_posts=F('published_posts') - (1 if post.is_published else 0),
+        listing_changed_at=timezone.now(),
+    )
+
+
+def reconcile():
+    """Recalcule tous les compteurs depuis les tables ; retourne les statistiques"""
+    def count(**filters):
+        return Coalesce(Subquery(
+            Comment.objects.filter(post=OuterRef('pk'), **filters)
+            .order_by().values('post').annotate(n=Count('pk')).values('n')
+        ), Value(0))
+
+    latest_comment = Subquery(
+        Comment.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(latest=Max('created_at')).values('latest')
+    )
+    Post.objects.update(
+        approved_comment_count=count(is_approved=True),
+        pending_comment_count=count(is_approved=False),
+        last_activity_at=Coalesce('last_activity_at', latest_comment),
+    )
+
+    totals = Post.objects.aggregate(
+        total_posts=Count('pk'),
+        published_posts=Count('pk', filter=Q(is_published=True)),
+    )
+    totals.update(Comment.objects.aggregate(
+        total_comments=Count('pk'),
+        pending_comments=Count('pk', filter=Q(is_approved=False)),
+    ))
+    SiteStats.objects.update_or_create(pk=1, defaults=totals)
+    return totals
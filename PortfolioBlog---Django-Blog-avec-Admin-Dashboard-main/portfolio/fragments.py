@@ -0,0 +1,67 @@
+"""Cache des fragments de template (cartes d'articles, commentaires).
+
+Chaque fragment est mis en cache sous une clé qui change avec ce qu'il
+affiche : (pk, updated_at, nombre de commentaires) pour un article,
+(pk, is_approved) pour un commentaire, plus une empreinte du template et la
+génération 'fragments' (invalidée quand un auteur change de nom ou qu'un
+commentaire est modifié). Une page lit tous ses fragments en un seul
+`get_many` et ne rend que les absents.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .caching import get_generations
+
+FRAGMENT_SCOPE = 'fragments'
+
+
+def post_key(post):
+    if getattr(post, 'search_snippet', None):
+        return None  # extrait propre à la recherche : pas de mise en cache
+    return f'{post.pk}:{post.updated_at.timestamp():.6f}:{post.approved_comment_count}'
+
+
+def comment_key(comment):
+    return f'{comment.pk}:{int(comment.is_approved)}'
+
+
+KEY_FUNCTIONS = {
+    'post': post_key,
+    'comment': comment_key,
+}
+
+
+def render_many(objects, template_name, kind):
+    """HTML concaténé du template `template_name` rendu pour chaque objet
+    (variable de contexte `kind`), depuis le cache quand c'est possible"""
+    objects = list(objects)
+    if not objects:
+        return ''
+    template = get_template(template_name)
+    # Un template modifié (déploiement) ne relit pas les anciens fragments
+    version = hashlib.md5(template.template.source.encode()).hexdigest()[:8]
+    generation = get_generations([FRAGMENT_SCOPE])[0]
+    prefix = f'frag:{template_name}:{version}:{generation}:'
+
+    key_function = KEY_FUNCTIONS[kind]
+    keys = []
+    for obj in objects:
+        key = key_function(obj)
+        keys.append(prefix + key if key else None)
+    cached = cache.get_many([key for key in keys if key])
+
+    parts, missing = [], {}
+    for obj, key in zip(objects, keys):
+        html = cached.get(key) if key else None
+        if html is None:
+            html = template.render({kind: obj})
+            if key:
+                missing[key] = html
+        parts.append(html)
+    if missing:
+        cache.set_many(missing, settings.FRAGMENT_CACHE_TIMEOUT)
+    return mark_safe(''.join(parts))
@@ -0,0 +1,85 @@
+"""Déclinaisons responsives des images d'articles (plusieurs largeurs et formats).
+
+Le manifeste stocké dans `Post.renditions` a la forme :
+    {"width": 1600, "height": 1200,
+     "sources": {"image/avif": [["posts_media/renditions/x_400.avif", 400], ...],
+                 "image/webp": [...], "image/jpeg": [...]}}
+"""
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+
+from django.core.files.base import ContentFile
+
+# Au-delà, l'image n'est pas décodée (bombe de décompression) ; pour un JPEG
+# compressé à l'envoi, compté après réduction au décodage (draft)
+IMAGE_MAX_PIXELS = 40_000_000
+RENDITION_WIDTHS = (400, 800, 1200, 1600)
+RENDITION_DIR = 'posts_media/renditions/'
+
+# (type MIME, format Pillow, extension, options d'encodage), du plus au moins efficace
+MODERN_FORMATS = [
+    ('image/avif', 'AVIF', '.avif', {'quality': 55}),
+    ('image/webp', 'WEBP', '.webp', {'quality': 75, 'method': 4}),
+]
+FALLBACK_FORMATS = {
+    '.png': ('image/png', 'PNG', '.png', {}),
+    '.jpg': ('image/jpeg', 'JPEG', '.jpg', {'quality': 75, 'progressive': True}),
+}
+
+
+def available_formats(ext):
+    """Formats générés pour une image source d'extension `ext`"""
+    formats = [fmt for fmt in MODERN_FORMATS if features.check(fmt[1].lower())]
+    formats.append(FALLBACK_FORMATS['.png' if ext == '.png' else '.jpg'])
+    return formats
+
+
+def check_pixels(img):
+    """Refuse une image trop grande avant son décodage (seul l'en-tête est lu)"""
+    if img.width * img.height > IMAGE_MAX_PIXELS:
+        raise Image.DecompressionBombError(f"Image trop grande : {img.width}x{img.height} pixels")
+
+
+def _encode(img, pil_format, options):
+    if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = BytesIO()
+    img.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def delete_renditions(storage, manifest):
+    for sources in (manifest or {}).get('sources', {}).values():
+        for name, _ in sources:
+            storage.delete(name)
+
+
+def generate_renditions(fieldfile):
+    """Crée les déclinaisons de `fieldfile` et retourne le manifeste ({} si impossible)"""
+    ext = os.path.splitext(fieldfile.name)[1].lower()
+    if ext not in ('.jpg', '.jpeg', '.png'):
+        return {}
+
+    storage = fieldfile.storage
+    stem = os.path.splitext(os.path.basename(fieldfile.name))[0]
+    with storage.open(fieldfile.name, 'rb') as source:
+        img = Image.open(source)
+        check_pixels(img)
+        img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGBA' if img.mode in ('P', 'LA', 'PA') else 'RGB')
+    width, height = img.size
+
+    # Largeurs inférieures à l'original, plus l'original lui-même (jamais d'agrandissement)
+    widths = sorted({w for w in RENDITION_WIDTHS if w < width} | {min(width, RENDITION_WIDTHS[-1])})
+    manifest = {'width': width, 'height': height, 'sources': {}}
+    for target in widths:
+        resized = img.copy()
+        resized.thumbnail((target, height), Image.LANCZOS)
+        for mime, pil_format, extension, options in available_formats(ext):
+            data = _encode(resized, pil_format, options)
+            name = storage.save(f'{RENDITION_DIR}{stem}_{resized.width}{extension}', ContentFile(data))
+            manifest['sources'].setdefault(mime, []).append([name, resized.width])
+    return manifest
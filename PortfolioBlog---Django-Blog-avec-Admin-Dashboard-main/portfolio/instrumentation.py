@@ -0,0 +1,256 @@
+"""Mesures par requête : latence, requêtes SQL, rendu des templates, taille.
+
+`PerformanceMiddleware` ouvre une mesure par requête (ContextVar, visible
+aussi dans les threads de sync_to_async). Le temps SQL est relevé par un
+execute wrapper posé par le middleware le temps de la requête, le temps de
+rendu par le backend `InstrumentedTemplates` (settings.TEMPLATES).
+
+Les données restent en mémoire, par processus :
+- les `PERF_SAMPLE_SIZE` dernières requêtes (anneau borné) pour les
+  percentiles du dashboard ;
+- des histogrammes cumulés par vue pour l'export Prometheus (`metrics`).
+"""
+import hmac
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates, Template
+
+# Bornes des histogrammes Prometheus, en secondes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+_samples = deque(maxlen=settings.PERF_SAMPLE_SIZE)
+_totals = {}
+
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    sql_time: float = 0.0
+    template_time: float = 0.0
+    rendering: bool = False  # un template inclus n'est pas compté deux fois
+
+
+@dataclass
+class Sample:
+    view: str
+    status: int
+    duration: float
+    queries: int
+    sql_time: float
+    template_time: float
+    size: int
+
+
+def record_sql(execute, sql, params, many, context):
+    """Execute wrapper : compte et chronomètre les requêtes de la requête HTTP en cours"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - start
+        metrics.queries += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None or metrics.rendering:
+            return super().render(context, request)
+        metrics.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+            metrics.rendering = False
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """Backend DjangoTemplates qui mesure le temps de rendu"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def _response_size(response):
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    if response.streaming:
+        return 0  # taille inconnue sans consommer le flux
+    return len(response.content)
+
+
+def _record(request, response, metrics, duration):
+    match = request.resolver_match
+    sample = Sample(
+        view=match.view_name if match else '<non résolue>',
+        status=response.status_code,
+        duration=duration,
+        queries=metrics.queries,
+        sql_time=metrics.sql_time,
+        template_time=metrics.template_time,
+        size=_response_size(response),
+    )
+    with _lock:
+        _samples.append(sample)
+        totals = _totals.setdefault(sample.view, {
+            'buckets': [0] * len(LATENCY_BUCKETS), 'count': 0, 'duration': 0.0,
+            'queries': 0, 'sql_time': 0.0, 'template_time': 0.0, 'size': 0,
+        })
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                totals['buckets'][i] += 1
+        totals['count'] += 1
+        totals['duration'] += duration
+        totals['queries'] += sample.queries
+        totals['sql_time'] += sample.sql_time
+        totals['template_time'] += sample.template_time
+        totals['size'] += sample.size
+
+
+def _wrap_queries():
+    """Pose `record_sql` sur chaque connexion, retiré en sortie du bloc.
+
+    `execute_wrapper()` empile et dépile : un wrapper ajouté à la main
+    (signal connection_created) ferait retirer le mauvais par un
+    `with connection.execute_wrapper(...)` ouvert avant la connexion.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(record_sql))
+    return stack
+
+
+class PerformanceMiddleware:
+    """Enregistre les mesures de chaque requête (à placer en tête de MIDDLEWARE)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with _wrap_queries():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        _record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with _wrap_queries():
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        _record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+
+def _percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def summary():
+    """Une ligne par vue (requêtes récentes) : percentiles de latence et moyennes, en ms"""
+    with _lock:
+        samples = list(_samples)
+    by_view = {}
+    for sample in samples:
+        by_view.setdefault(sample.view, []).append(sample)
+    rows = []
+    for view, view_samples in by_view.items():
+        count = len(view_samples)
+        durations = sorted(sample.duration * 1000 for sample in view_samples)
+        rows.append({
+            'view': view,
+            'count': count,
+            'p50': _percentile(durations, 0.5),
+            'p95': _percentile(durations, 0.95),
+            'p99': _percentile(durations, 0.99),
+            'queries': sum(sample.queries for sample in view_samples) / count,
+            'sql_ms': sum(sample.sql_time for sample in view_samples) * 1000 / count,
+            'template_ms': sum(sample.template_time for sample in view_samples) * 1000 / count,
+            'size': sum(sample.size for sample in view_samples) // count,
+            'errors': sum(sample.status >= 500 for sample in view_samples),
+        })
+    rows.sort(key=lambda row: row['p95'], reverse=True)
+    return rows
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+
+
+def _label(view):
+    return view.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text():
+    with _lock:
+        totals = {view: dict(values, buckets=list(values['buckets'])) for view, values in _totals.items()}
+    lines = [
+        '# HELP portfolio_request_duration_seconds Durée des requêtes par vue.',
+        '# TYPE portfolio_request_duration_seconds histogram',
+    ]
+    for view, values in sorted(totals.items()):
+        label = _label(view)
+        for bound, count in zip(LATENCY_BUCKETS, values['buckets']):
+            lines.append(f'portfolio_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {count}')
+        lines.append(f'portfolio_request_duration_seconds_bucket{{view="{label}",le="+Inf"}} {values["count"]}')
+        lines.append(f'portfolio_request_duration_seconds_sum{{view="{label}"}} {values["duration"]}')
+        lines.append(f'portfolio_request_duration_seconds_count{{view="{label}"}} {values["count"]}')
+    counters = [
+        ('portfolio_sql_queries_total', 'queries', 'Requêtes SQL exécutées.'),
+        ('portfolio_sql_seconds_total', 'sql_time', 'Temps passé en SQL.'),
+        ('portfolio_template_seconds_total', 'template_time', 'Temps de rendu des templates.'),
+        ('portfolio_response_bytes_total', 'size', 'Octets des réponses (hors flux sans Content-Length).'),
+    ]
+    for name, field, help_text in counters:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for view, values in sorted(totals.items()):
+            lines.append(f'{name}{{view="{_label(view)}"}} {values[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics(request):
+    """Export Prometheus : réservé à l'équipe ou au porteur de METRICS_TOKEN"""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    allowed = request.user.is_staff or (
+        token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode())
+    )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from portfolio import tasks
+from portfolio.models import Post
+
+VIDEO_FIELDS = ('video_id', 'video_embed_url', 'video_thumbnail')
+
+
+class Command(BaseCommand):
+    help = ("Calcule l'identifiant, l'URL d'intégration et la miniature des vidéos YouTube "
+            "des articles existants")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fetch', action='store_true',
+                            help="Télécharge les miniatures maintenant au lieu de créer des jobs")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(video_url=None).exclude(video_url='')
+        updated, seen, downloaded, queued, invalid = [], set(), 0, 0, 0
+        for post in posts.only('pk', 'video_url', *VIDEO_FIELDS).iterator():
+            before = (post.video_id, post.video_embed_url, post.video_thumbnail.name)
+            needs_thumbnail = post.set_video_metadata() and post.video_id not in seen
+            if not post.video_id:
+                invalid += 1
+                self.stdout.write(self.style.WARNING(f"URL non reconnue (article {post.pk}) : {post.video_url}"))
+            if (post.video_id, post.video_embed_url, post.video_thumbnail.name) != before:
+                Post.objects.filter(pk=post.pk).update(
+                    video_id=post.video_id, video_embed_url=post.video_embed_url,
+                    video_thumbnail=post.video_thumbnail.name, updated_at=timezone.now(),
+                )
+                updated.append(post.pk)
+            if not needs_thumbnail:
+                continue
+            # Une seule miniature par vidéo : elle sert à tous les articles qui l'intègrent
+            seen.add(post.video_id)
+            if options['fetch']:
+                try:
+                    downloaded += bool(tasks.store_video_thumbnail(post, post.video_id))
+                except Exception as exc:
+                    self.stdout.write(self.style.WARNING(f"Miniature de {post.video_id} : {exc}"))
+            elif post.queue_video_thumbnail():
+                queued += 1
+
+        tasks.invalidate_posts(updated)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(updated)} article(s) mis à jour, {downloaded} miniature(s) associée(s), "
+            f"{queued} job(s) créé(s), {invalid} URL non reconnue(s)."
+        ))
@@ -0,0 +1,106 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_URLS = ['/', '/blog/', '/blog/?page=3', '/post/1/']
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"Le serveur du port {port} n'a pas démarré")
+
+
+async def fetch(port, path):
+    """GET HTTP/1.1 minimal (Connection: close) ; retourne (statut, latence en s)"""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1]), time.perf_counter() - start
+
+
+async def load(port, path, total, concurrency):
+    """`total` requêtes réparties sur `concurrency` clients ; retourne (req/s, p50, p99, erreurs)"""
+    latencies, errors = [], 0
+    remaining = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            status, latency = await fetch(port, path)
+            latencies.append(latency)
+            errors += status >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return total / elapsed, percentile(0.5), percentile(0.99), errors
+
+
+class Command(BaseCommand):
+    help = ("Test de charge des pages publiques : vues sync sous WSGI (runserver) "
+            "contre vues async sous ASGI (uvicorn), sur la même base SQLite")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--urls', nargs='+', default=DEFAULT_URLS)
+        parser.add_argument('--port', type=int, default=8760, help="port WSGI ; ASGI = port + 1")
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError("uvicorn est requis pour ce test : pip install uvicorn")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DJANGO_DB_NAME=os.path.join(tmp, 'bench.sqlite3'),
+                       DJANGO_CACHE_BACKEND='dummy', DJANGO_ASYNC_VIEWS='0')
+            manage = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')]
+            self.stdout.write(f"Préparation d'une base de {options['posts']} articles...")
+            subprocess.run(manage + ['migrate', '-v', '0'], env=env, check=True)
+            subprocess.run(manage + ['shell', '-v', '0', '-c',
+                                     f"from portfolio.benchmarks import seed_posts; seed_posts({options['posts']})"],
+                           env=env, check=True)
+
+            port = options['port']
+            servers = {
+                'WSGI sync': (manage + ['runserver', f'127.0.0.1:{port}', '--noreload'], port, env),
+                'ASGI async': ([sys.executable, '-m', 'uvicorn', 'portfolio_project.asgi:application',
+                                '--port', str(port + 1), '--log-level', 'warning', '--no-access-log'],
+                               port + 1, dict(env, DJANGO_ASYNC_VIEWS='1')),
+            }
+            self.stdout.write(f"{'serveur':>11} {'url':>16} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'erreurs':>8}")
+            for label, (command, server_port, server_env) in servers.items():
+                process = subprocess.Popen(command, env=server_env, cwd=settings.BASE_DIR,
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                try:
+                    wait_for_port(server_port)
+                    for url in options['urls']:
+                        asyncio.run(load(server_port, url, 20, 5))  # échauffement
+                        rps, p50, p99, errors = asyncio.run(
+                            load(server_port, url, options['requests'], options['concurrency'])
+                        )
+                        self.stdout.write(f"{label:>11} {url:>16} {rps:>8.1f} {p50:>8.1f} {p99:>8.1f} {errors:>8}")
+                finally:
+                    process.terminate()
+                    process.wait()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from portfolio.benchmarks import measure, seed_posts, temporary_database
+
+
+class Command(BaseCommand):
+    help = "Mesure la latence de /blog/ (page 1 et dernière page) selon le nombre de posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client()
+        with temporary_database():
+            total = 0
+            self.stdout.write(f"{'posts':>8} {'page':>6} {'médiane ms':>11} {'p95 ms':>8} {'requêtes':>9}")
+            for size in sorted(options['sizes']):
+                seed_posts(size - total)
+                total = size
+                last_page = (total + 5) // 6
+                for page in (1, last_page):
+                    result = measure(lambda: client.get('/blog/', {'page': page}), options['repeat'])
+                    self.stdout.write(
+                        f"{total:>8} {page:>6} {result['median_ms']:>11.2f} "
+                        f"{result['p95_ms']:>8.2f} {result['queries']:>9}"
+                    )
@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+PROFILES = {
+    'SQLite d\'origine': '0',
+    'WAL + IMMEDIATE': '1',
+}
+
+
+def write_comments(post_ids, author, count, results):
+    """Lit un article puis le commente dans une transaction, comme post_detail en POST"""
+    from portfolio.models import Comment, Post
+
+    latencies, locked = [], 0
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    post = Post.objects.only('pk').get(pk=post_ids[i % len(post_ids)])
+                    Comment.objects.create(post=post, author=author, content=f"Commentaire {i}")
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+            latencies.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+    results.append((latencies, locked))
+
+
+def read_listing(stop, results):
+    from portfolio.models import Post
+
+    reads, locked = 0, 0
+    try:
+        while not stop.is_set():
+            try:
+                list(Post.objects.filter(is_published=True).order_by('-created_at', '-id')
+                     .values_list('pk', 'title')[:6])
+                reads += 1
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+    finally:
+        connection.close()
+    results.append((reads, locked))
+
+
+class Command(BaseCommand):
+    help = ("Écritures concurrentes sur SQLite : profil d'origine contre WAL, "
+            "synchronous=NORMAL et transactions IMMEDIATE (erreurs « database is locked »)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--comments', type=int, default=200, help="commentaires par écrivain")
+        parser.add_argument('--worker', action='store_true', help="usage interne : exécute la charge")
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.run_worker(options)
+
+        manage = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')]
+        self.stdout.write(f"{'profil':>18} {'écritures/s':>12} {'p99 ms':>8} {'verrous':>8} {'lectures/s':>11}")
+        for label, tuning in PROFILES.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                env = dict(os.environ, DJANGO_DB_ENGINE='sqlite', DJANGO_DB_NAME=os.path.join(tmp, 'bench.sqlite3'),
+                           DJANGO_CACHE_BACKEND='dummy', DJANGO_SQLITE_TUNING=tuning)
+                subprocess.run(manage + ['migrate', '-v', '0'], env=env, check=True)
+                # Processus séparé : chaque profil est lu au démarrage des settings
+                output = subprocess.run(
+                    manage + ['bench_db_concurrency', '--worker',
+                              '--writers', str(options['writers']), '--readers', str(options['readers']),
+                              '--comments', str(options['comments'])],
+                    env=env, check=True, capture_output=True, text=True,
+                ).stdout
+                stats = json.loads(output)
+                self.stdout.write(
+                    f"{label:>18} {stats['writes_per_s']:>12.1f} {stats['p99_ms']:>8.1f} "
+                    f"{stats['locked']:>8} {stats['reads_per_s']:>11.1f}"
+                )
+
+    def run_worker(self, options):
+        from portfolio.benchmarks import get_bench_author, seed_posts
+        from portfolio.models import Post
+
+        seed_posts(50)
+        author = get_bench_author()
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        connection.close()
+
+        writes, reads, stop = [], [], threading.Event()
+        writers = [threading.Thread(target=write_comments, args=(post_ids, author, options['comments'], writes))
+                   for _ in range(options['writers'])]
+        readers = [threading.Thread(target=read_listing, args=(stop, reads))
+                   for _ in range(options['readers'])]
+        start = time.perf_counter()
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        latencies = sorted(latency for thread_latencies, _ in writes for latency in thread_latencies)
+        locked = sum(count for _, count in writes) + sum(count for _, count in reads)
+        self.stdout.write(json.dumps({
+            'writes_per_s': (len(latencies) - sum(count for _, count in writes)) / elapsed,
+            'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+            'locked': locked,
+            'reads_per_s': sum(count for count, _ in reads) / elapsed,
+        }))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.test import Client
+from django.urls import reverse
+
+from portfolio import instrumentation
+from portfolio.benchmarks import seed_benchmark_data, temporary_database
+from portfolio.models import Post
+
+
+class Command(BaseCommand):
+    help = ("Temps de rendu des templates (accueil, blog, détail) sans cache de fragments, "
+            "puis avec fragments froids et chauds")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=300)
+        parser.add_argument('--comments', type=int, default=3000)
+        parser.add_argument('--repeat', type=int, default=30)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'page':>12} {'mode':>18} {'templates ms':>13} {'p50 ms':>9}")
+        # Sans cache (DummyCache) : rendu complet de chaque carte, comme avant
+        for use_cache in (False, True):
+            with temporary_database(use_cache=use_cache):
+                seed_benchmark_data(posts=options['posts'], comments=options['comments'], image_ratio=0)
+                self.run_pages(use_cache, options['repeat'])
+
+    def run_pages(self, use_cache, repeat):
+        client = Client()
+        # Connecté : le cache des pages publiques ne court-circuite pas le rendu
+        client.force_login(Post.objects.first().author)
+        post = Post.objects.filter(is_published=True).order_by(F('approved_comment_count').desc()).first()
+        pages = {'accueil': reverse('home'), 'blog': reverse('blog'),
+                 'détail': reverse('post_detail', args=[post.pk])}
+        for label, url in pages.items():
+            modes = [('fragments froids', 1), ('fragments chauds', repeat)] if use_cache else [('sans cache', repeat)]
+            for mode, count in modes:
+                instrumentation.reset()
+                for _ in range(count):
+                    client.get(url)
+                row = instrumentation.summary()[0]
+                self.stdout.write(f"{label:>12} {mode:>18} {row['template_ms']:>13.2f} {row['p50']:>9.2f}")
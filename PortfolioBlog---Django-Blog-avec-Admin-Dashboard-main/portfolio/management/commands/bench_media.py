@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve as static_serve
+
+from portfolio import mediafiles
+
+
+def consume(response):
+    if response.streaming:
+        return sum(len(block) for block in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = "Débit du service des médias : ancienne vue `static.serve` contre mediafiles (complet et Range)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pdf-mb', type=float, default=2)
+        parser.add_argument('--image-mb', type=float, default=20)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root, MEDIA_SERVE_BACKEND='python'):
+                files = {
+                    'PDF': default_storage.save('cv/cv.pdf', ContentFile(os.urandom(int(options['pdf_mb'] * 2**20)))),
+                    'image': default_storage.save('posts_media/grande.jpg', ContentFile(os.urandom(int(options['image_mb'] * 2**20)))),
+                }
+                self.stdout.write(f"{'fichier':>8} {'mode':>22} {'médiane ms':>11} {'Mo/s':>9}")
+                for label, name in files.items():
+                    self.bench(label, name, media_root, options['repeat'])
+        finally:
+            shutil.rmtree(media_root)
+
+    def bench(self, label, name, media_root, repeat):
+        factory = RequestFactory()
+        size = os.path.getsize(os.path.join(media_root, name))
+        etag = mediafiles.serve(factory.get('/'), name)['ETag']
+        cases = [
+            ('static.serve (avant)', lambda: static_serve(factory.get('/'), name, document_root=media_root), size),
+            ('mediafiles', lambda: mediafiles.serve(factory.get('/'), name), size),
+            ('mediafiles Range 1 Mo', lambda: mediafiles.serve(
+                factory.get('/', HTTP_RANGE=f'bytes={size // 2}-{size // 2 + 2**20 - 1}'), name), 2**20),
+            ('mediafiles 304', lambda: mediafiles.serve(factory.get('/', HTTP_IF_NONE_MATCH=etag), name), 0),
+        ]
+        for mode, func, expected in cases:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                received = consume(func())
+                timings.append(time.perf_counter() - start)
+            assert received == min(expected, size), (mode, received)
+            timings.sort()
+            median = timings[len(timings) // 2]
+            self.stdout.write(f"{label:>8} {mode:>22} {median * 1000:>11.2f} {received / 2**20 / median:>9.0f}")
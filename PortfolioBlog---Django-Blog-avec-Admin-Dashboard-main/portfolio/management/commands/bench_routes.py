@@ -0,0 +1,157 @@
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from portfolio import urls as portfolio_urls
+from portfolio.benchmarks import get_bench_author, measure, seed_benchmark_data, temporary_database
+from portfolio.models import Comment, Post
+
+REPORT_VERSION = 1
+
+
+def route_cases(post, comment):
+    """(libellé, nom d'URL, args, données, connecté en staff, méthode) pour chaque route"""
+    return [
+        ('home', 'home', [], {}, False, 'get'),
+        ('blog', 'blog', [], {}, False, 'get'),
+        ('blog ?page=10', 'blog', [], {'page': 10}, False, 'get'),
+        ('blog ?search', 'blog', [], {'search': 'django'}, False, 'get'),
+        ('post_detail', 'post_detail', [post.pk], {}, False, 'get'),
+        ('register', 'register', [], {}, False, 'get'),
+        ('login', 'login', [], {}, False, 'get'),
+        ('logout', 'logout', [], {}, False, 'post'),
+        ('download_cv', 'download_cv', [], {}, False, 'get'),
+        ('sitemap.xml', 'django-sitemap', [], {}, False, 'get'),
+        ('sitemap-posts.xml', 'sitemap_section', ['posts'], {}, False, 'get'),
+        ('admin_dashboard', 'admin_dashboard', [], {}, True, 'get'),
+        ('admin_cv_settings', 'admin_cv_settings', [], {}, True, 'get'),
+        ('admin_posts', 'admin_posts', [], {}, True, 'get'),
+        ('admin_post_create', 'admin_post_create', [], {}, True, 'get'),
+        ('admin_post_edit', 'admin_post_edit', [post.pk], {}, True, 'get'),
+        ('admin_post_delete', 'admin_post_delete', [post.pk], {}, True, 'get'),
+        ('admin_comments', 'admin_comments', [], {}, True, 'get'),
+        ('admin_comments ?status', 'admin_comments', [], {'status': 'pending'}, True, 'get'),
+        ('admin_comments_bulk', 'admin_comments_bulk', [],
+         {'action': 'approve', 'status': 'pending', 'select_all': '1'}, True, 'post'),
+        ('admin_comment_toggle', 'admin_comment_toggle', [comment.pk], {}, True, 'get'),
+        ('admin_comment_delete', 'admin_comment_delete', [comment.pk], {}, True, 'get'),
+    ]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ("Mesure chaque route de portfolio/urls.py et le sitemap (latence, requêtes SQL, "
+            "mémoire) sur un jeu de données synthétique ; rapport JSON comparable entre commits")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--cache', action='store_true', help="active un cache mémoire isolé")
+        parser.add_argument('--output', help="écrit le rapport JSON dans ce fichier")
+        parser.add_argument('--compare', help="rapport JSON de référence (commit précédent)")
+        parser.add_argument('--threshold', type=float, default=20,
+                            help="hausse de latence médiane (%%) signalée comme régression")
+        parser.add_argument('--strict', action='store_true', help="échoue en cas de régression")
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        try:
+            with temporary_database(use_cache=options['cache']), override_settings(MEDIA_ROOT=media_root):
+                routes = self.run_routes(options)
+        finally:
+            shutil.rmtree(media_root)
+
+        report = {
+            'version': REPORT_VERSION,
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'dataset': {key: options[key] for key in ('users', 'posts', 'comments', 'seed')},
+            'repeat': options['repeat'],
+            'cache': options['cache'],
+            'routes': routes,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Rapport écrit dans {options['output']}")
+        if options['compare']:
+            self.compare(report, options)
+
+    def run_routes(self, options):
+        self.stdout.write(f"Préparation : {options['posts']} articles, {options['comments']} commentaires...")
+        seed_benchmark_data(users=options['users'], posts=options['posts'],
+                            comments=options['comments'], seed=options['seed'])
+        post = Post.objects.filter(is_published=True).order_by(
+            F('approved_comment_count').desc(), 'pk').first()
+        comment = Comment.objects.filter(post=post).order_by('pk').first()
+        anonymous, staff = Client(), Client()
+        staff.force_login(get_bench_author())
+
+        cases = route_cases(post, comment)
+        measured = {name for _, name, *_ in cases}
+        missing = [p.name for p in portfolio_urls.urlpatterns if p.name not in measured]
+        if missing:
+            self.stderr.write(f"Routes non mesurées : {', '.join(missing)}")
+
+        routes = {}
+        self.stdout.write(f"{'route':>24} {'statut':>6} {'médiane ms':>11} {'p95 ms':>8} {'requêtes':>9} {'pic Kio':>9}")
+        for label, name, args, data, as_staff, method in cases:
+            client = staff if as_staff else anonymous
+            url = reverse(name, args=args)
+            statuses = []
+
+            def call():
+                statuses.append(getattr(client, method)(url, data).status_code)
+                client.cookies.pop('messages', None)  # messages flash non affichés
+
+            result = measure(call, options['repeat'], memory=True)
+            result['status'] = statuses[0]
+            routes[label] = result
+            self.stdout.write(
+                f"{label:>24} {result['status']:>6} {result['median_ms']:>11.2f} {result['p95_ms']:>8.2f} "
+                f"{result['queries']:>9} {result['peak_kib']:>9.0f}"
+            )
+        return routes
+
+    def compare(self, report, options):
+        with open(options['compare']) as f:
+            baseline = json.load(f)
+        if baseline.get('dataset') != report['dataset']:
+            self.stderr.write("Attention : jeux de données différents, comparaison approximative")
+        self.stdout.write(f"\nComparaison avec {baseline.get('revision') or options['compare']}")
+        self.stdout.write(f"{'route':>24} {'médiane':>9} {'requêtes':>9} {'pic Kio':>9}")
+        regressions = []
+        for label, result in report['routes'].items():
+            before = baseline['routes'].get(label)
+            if before is None:
+                continue
+            latency = 100 * (result['median_ms'] / max(before['median_ms'], 0.001) - 1)
+            queries = result['queries'] - before['queries']
+            memory = result['peak_kib'] - before.get('peak_kib', result['peak_kib'])
+            flag = ''
+            if latency > options['threshold'] or queries > 0:
+                regressions.append(label)
+                flag = '  <- régression'
+            self.stdout.write(f"{label:>24} {latency:>+8.0f}% {queries:>+9} {memory:>+9.0f}{flag}")
+        if regressions and options['strict']:
+            raise CommandError(f"Régressions : {', '.join(regressions)}")
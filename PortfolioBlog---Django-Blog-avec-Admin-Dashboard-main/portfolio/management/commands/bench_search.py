@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.test import RequestFactory
+
+from portfolio import search
+from portfolio.benchmarks import measure, seed_posts, temporary_database
+from portfolio.models import Post
+
+
+def like_search(query):
+    """Ancienne implémentation : LIKE '%q%' sur le titre et le contenu, COUNT + 1re page"""
+    posts = Post.objects.filter(is_published=True).filter(
+        Q(title__icontains=query) | Q(content__icontains=query)
+    ).order_by('-created_at', '-id')
+    posts.count()
+    list(posts[:6])
+
+
+class Command(BaseCommand):
+    help = "Compare la recherche LIKE et l'index plein texte à plusieurs volumes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000])
+        parser.add_argument('--queries', nargs='+', default=['django', 'test', '4242', 'introuvable'])
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/blog/')
+        with temporary_database():
+            engine = search.backend() or 'LIKE (aucun index)'
+            self.stdout.write(f"Index plein texte : {engine}")
+            self.stdout.write(f"{'posts':>8} {'requête':>12} {'LIKE ms':>9} {'index ms':>9} {'gain':>7}")
+            total = 0
+            for size in sorted(options['sizes']):
+                # Contenu plus court que bench_blog pour garder 100k posts en mémoire
+                seed_posts(size - total, paragraphs=3)
+                total = size
+                search.rebuild_index()
+                for query in options['queries']:
+                    like = measure(lambda: like_search(query), options['repeat'])
+                    fts = measure(lambda: search.search_page(request, query, 6), options['repeat'])
+                    self.stdout.write(
+                        f"{total:>8} {query:>12} {like['median_ms']:>9.2f} "
+                        f"{fts['median_ms']:>9.2f} {like['median_ms'] / max(fts['median_ms'], 0.001):>6.1f}x"
+                    )
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from portfolio.benchmarks import get_bench_author, seed_benchmark_data, temporary_database
+from portfolio.models import Post
+
+
+def flows(post):
+    """(parcours, [(étape, méthode, URL, données)]) : écriture, redirection, message affiché"""
+    detail = reverse('post_detail', args=[post.pk])
+    edit = reverse('admin_post_edit', args=[post.pk])
+    form = {'title': post.title, 'content': 'Contenu modifié', 'video_url': post.video_url,
+            'media_type': 'video', 'is_published': 'on'}
+    return [
+        ('commentaire', [
+            ('POST commentaire', 'post', detail, {'content': 'Commentaire de mesure'}),
+            ('GET détail + message', 'get', detail, {}),
+        ]),
+        ('édition admin', [
+            ('GET formulaire', 'get', edit, {}),
+            ('POST formulaire', 'post', edit, form),
+            ('GET liste + message', 'get', reverse('admin_posts'), {}),
+        ]),
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Requêtes SQL (dont celles de la table des sessions) et latence par requête des parcours "
+            "« poster un commentaire » et « modifier un article », pour chaque profil de sessions")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--comments', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with temporary_database(use_cache=True), override_settings(RATE_LIMIT_ENABLED=False):
+            seed_benchmark_data(posts=options['posts'], comments=options['comments'], image_ratio=0)
+            # Article vidéo : le formulaire exige une image ou une URL de vidéo
+            post = Post.objects.filter(is_published=True).exclude(video_url=None).order_by('pk').first()
+            self.stdout.write(f"{'profil':>10} {'parcours':>14} {'étape':>22} {'requêtes':>9} "
+                              f"{'sessions':>9} {'p50 ms':>8}")
+            for profile, (engine, storage) in settings.SESSION_PROFILES.items():
+                with override_settings(SESSION_ENGINE=engine, MESSAGE_STORAGE=storage):
+                    self.run_profile(profile, post, options['repeat'])
+
+    def run_profile(self, profile, post, repeat):
+        # Nouveau client : SessionMiddleware lit SESSION_ENGINE au chargement
+        client = Client()
+        client.force_login(get_bench_author())
+        for flow, steps in flows(post):
+            stats = {label: {'queries': [], 'session': [], 'ms': []} for label, *_ in steps}
+            for i in range(repeat + 1):
+                for label, method, url, data in steps:
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        getattr(client, method)(url, data)
+                        elapsed = (time.perf_counter() - start) * 1000
+                    if i == 0:
+                        continue  # échauffement
+                    stats[label]['queries'].append(len(ctx.captured_queries))
+                    stats[label]['session'].append(
+                        sum('django_session' in query['sql'] for query in ctx.captured_queries))
+                    stats[label]['ms'].append(elapsed)
+            for label, values in stats.items():
+                median = sorted(values['ms'])[len(values['ms']) // 2]
+                self.stdout.write(
+                    f"{profile:>10} {flow:>14} {label:>22} {max(values['queries']):>9} "
+                    f"{max(values['session']):>9} {median:>8.2f}"
+                )
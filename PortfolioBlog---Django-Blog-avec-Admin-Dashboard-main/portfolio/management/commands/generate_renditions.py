@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import tasks
+from portfolio.models import Post
+
+
+class Command(BaseCommand):
+    help = "Génère les déclinaisons responsives (tailles, WebP/AVIF) des images existantes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Régénère aussi les images qui ont déjà un manifeste")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.filter(media_type='image').exclude(media='').exclude(media=None)
+        if not options['force']:
+            posts = posts.filter(renditions={})
+
+        done = 0
+        for post in posts.only('pk', 'media', 'renditions').iterator():
+            if not post.media.storage.exists(post.media.name):
+                self.stdout.write(self.style.WARNING(f"Fichier introuvable : {post.media.name}"))
+                continue
+            manifest = tasks.refresh_renditions(post)
+            done += 1
+            self.stdout.write(f"{post.media.name} : {sum(len(s) for s in manifest.get('sources', {}).values())} fichier(s)")
+        self.stdout.write(self.style.SUCCESS(f"{done} image(s) traitée(s)."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from portfolio import tasks
+
+
+class Command(BaseCommand):
+    help = "Traite la file de compression des médias (worker, sans broker externe)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Vide la file puis s'arrête (utile en tâche planifiée)")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Attente en secondes lorsque la file est vide")
+        parser.add_argument('--retry-failed', action='store_true',
+                            help=f"Remet en attente les jobs en échec (moins de {tasks.MAX_ATTEMPTS} tentatives)")
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f"{tasks.retry_failed_jobs()} job(s) en échec remis en attente.")
+
+        while True:
+            requeued = tasks.requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"{requeued} job(s) interrompu(s) remis en attente."))
+            processed = tasks.run_pending()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"{processed} job(s) traité(s)."))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
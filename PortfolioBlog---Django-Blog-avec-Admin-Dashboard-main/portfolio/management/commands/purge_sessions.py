@@ -0,0 +1,33 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ("Supprime les sessions expirées de la base par lots, sans bloquer les écritures "
+            "du site (tâche planifiée, ex. chaque nuit)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            # Sessions en cache ou en cookie : elles expirent d'elles-mêmes
+            store.clear_expired()
+            self.stdout.write(f"Aucune session en base avec {settings.SESSION_ENGINE}.")
+            return
+
+        model = store.get_model_class()
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # Lots courts : chaque DELETE ne verrouille SQLite qu'un instant
+            keys = list(model.objects.filter(expire_date__lt=now)
+                        .values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted += model.objects.filter(session_key__in=keys).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"{deleted} session(s) expirée(s) supprimée(s)."))
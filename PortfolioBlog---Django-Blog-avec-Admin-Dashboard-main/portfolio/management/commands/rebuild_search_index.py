@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des articles"
+
+    def handle(self, *args, **options):
+        engine = search.backend()
+        if engine is None:
+            self.stdout.write(self.style.WARNING(
+                "Aucun index plein texte pour cette base : la recherche utilise LIKE."
+            ))
+            return
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Index {engine} reconstruit ({count} articles)."))
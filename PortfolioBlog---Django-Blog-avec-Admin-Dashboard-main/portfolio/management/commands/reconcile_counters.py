@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de commentaires des articles et les statistiques globales"
+
+    def handle(self, *args, **options):
+        totals = counters.reconcile()
+        for name, value in totals.items():
+            self.stdout.write(f"{name} : {value}")
+        self.stdout.write(self.style.SUCCESS("Compteurs réconciliés."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from portfolio import caching, tasks
+from portfolio.fragments import FRAGMENT_SCOPE
+from portfolio.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recalcule le HTML et l'extrait stockés des articles"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true',
+                            help="Ne traite que les articles sans HTML précalculé")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('pk', 'content', 'content_html', 'excerpt')
+        if options['missing']:
+            posts = posts.filter(content_html='')
+
+        batch, updated = [], []
+        for post in posts.iterator(chunk_size=500):
+            before = (post.content_html, post.excerpt)
+            post.render_content()
+            if (post.content_html, post.excerpt) == before:
+                continue
+            batch.append(post)
+            updated.append(post.pk)
+            if len(batch) == 500:
+                self.flush(batch)
+        self.flush(batch)
+
+        if updated:
+            # bulk_update ne touche pas updated_at : les clés des fragments ne
+            # changent pas, on invalide donc pages et fragments explicitement
+            tasks.invalidate_posts(updated)
+            caching.invalidate(FRAGMENT_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f"{len(updated)} article(s) mis à jour."))
+
+    def flush(self, batch):
+        # bulk_update : pas de signaux ni de modification de updated_at
+        Post.objects.bulk_update(batch, ['content_html', 'excerpt'])
+        batch.clear()
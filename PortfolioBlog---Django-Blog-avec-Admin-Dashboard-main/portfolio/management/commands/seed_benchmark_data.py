@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.benchmarks import seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = ("Génère utilisateurs, articles (images, vidéos) et commentaires synthétiques "
+            "dans la base configurée (DJANGO_DB_NAME pour une base dédiée)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--image-ratio', type=float, default=0.2)
+        parser.add_argument('--video-ratio', type=float, default=0.3)
+        parser.add_argument('--seed', type=int, default=42, help="même graine, mêmes données")
+
+    def handle(self, *args, **options):
+        totals = seed_benchmark_data(
+            users=options['users'], posts=options['posts'], comments=options['comments'],
+            image_ratio=options['image_ratio'], video_ratio=options['video_ratio'], seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['users']} utilisateurs, {totals['posts']} articles et {totals['comments']} commentaires créés "
+            f"({totals['published_posts']} articles publiés, {totals['pending_comments']} commentaires en attente au total)"
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.assets import compression_report
+from portfolio.storage import is_hashed_name, precompressed_variants
+
+
+class Command(BaseCommand):
+    help = "Octets économisés par les variantes précompressées de STATIC_ROOT (après collectstatic)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="inclut les copies sans empreinte (par défaut : fichiers servis, avec empreinte)")
+
+    def handle(self, *args, **options):
+        encodings = [encoding for encoding, _ in precompressed_variants()]
+        rows = [row for row in compression_report() if options['all'] or is_hashed_name(row['name'])]
+        header = f"{'fichier':<60} {'octets':>9}" + ''.join(f" {encoding:>9} {'gain':>6}" for encoding in encodings)
+        self.stdout.write(header)
+        totals = {'size': 0, **{encoding: 0 for encoding in encodings}}
+        for row in rows:
+            line = f"{row['name'][-60:]:<60} {row['size']:>9}"
+            totals['size'] += row['size']
+            for encoding in encodings:
+                # Sans variante, le fichier est servi tel quel
+                size = row[encoding] if row[encoding] is not None else row['size']
+                totals[encoding] += size
+                line += f" {size:>9} {self.saving(row['size'], size):>6}"
+            self.stdout.write(line)
+        summary = f"{'total (' + str(len(rows)) + ' fichiers)':<60} {totals['size']:>9}"
+        for encoding in encodings:
+            summary += f" {totals[encoding]:>9} {self.saving(totals['size'], totals[encoding]):>6}"
+        self.stdout.write(summary)
+
+    @staticmethod
+    def saving(size, compressed):
+        return f"{100 * (1 - compressed / size):.0f}%" if size else '-'
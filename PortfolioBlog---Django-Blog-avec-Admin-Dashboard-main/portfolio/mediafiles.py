@@ -0,0 +1,163 @@
+"""Service des fichiers de MEDIA_ROOT (images des articles, CV).
+
+Selon `MEDIA_SERVE_BACKEND` :
+- 'python' : FileResponse, avec requêtes partielles (Range → 206) ;
+- 'nginx' : en-tête X-Accel-Redirect, nginx envoie le fichier depuis une
+  location `internal` (MEDIA_ACCEL_PREFIX) qui pointe sur MEDIA_ROOT ;
+- 'sendfile' : en-tête X-Sendfile (Apache mod_xsendfile, lighttpd).
+
+Les noms contenant une empreinte du contenu (storage.py) sont servis avec
+un Cache-Control d'un an, `immutable`. Sous ASGI (`aserve`), le fichier est
+lu par blocs via un itérateur async au lieu d'être chargé en mémoire.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from .storage import is_hashed_name
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365  # secondes
+DEFAULT_MAX_AGE = 60 * 60
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """(début, fin) inclus pour un en-tête Range simple ; None pour l'ignorer.
+
+    Lève ValueError si la plage est hors du fichier (réponse 416).
+    Les plages multiples sont ignorées : le fichier entier est envoyé.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N : les N derniers octets
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+async def _aread_range(path, start, length):
+    f = await sync_to_async(open)(path, 'rb')
+    try:
+        await sync_to_async(f.seek)(start)
+        while length > 0:
+            block = await sync_to_async(f.read)(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        f.close()
+
+
+def _python_response(request, path, size, etag, content_type, asynchronous=False):
+    header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # If-Range : plage servie seulement si le client a encore cette version
+    if header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            read = _aread_range if asynchronous else _read_range
+            response = StreamingHttpResponse(
+                read(path, start, end - start + 1), status=206, content_type=content_type
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            return response
+    if asynchronous:
+        response = StreamingHttpResponse(_aread_range(path, 0, size), content_type=content_type)
+        response['Content-Length'] = str(size)
+        return response
+    # FileResponse utilise wsgi.file_wrapper (sendfile) quand le serveur le propose
+    return FileResponse(open(path, 'rb'), content_type=content_type)
+
+
+def _offload_response(path, name, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SERVE_BACKEND == 'nginx':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def serve_file(request, name, max_age=None, filename=None, asynchronous=False):
+    """Réponse pour le fichier `name` (relatif à MEDIA_ROOT), ou Http404.
+
+    `asynchronous` : contenu en itérateur async, pour les vues ASGI.
+    """
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404("Chemin invalide")
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404("Fichier introuvable")
+    if not os.path.isfile(path):
+        raise Http404("Fichier introuvable")
+
+    etag = quote_etag(f'{stat.st_size:x}-{stat.st_mtime_ns:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if settings.MEDIA_SERVE_BACKEND in ('nginx', 'sendfile'):
+            response = _offload_response(path, name, content_type)
+        else:
+            response = _python_response(request, path, stat.st_size, etag, content_type, asynchronous)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if filename:
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+    if max_age is None and is_hashed_name(name):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=DEFAULT_MAX_AGE if max_age is None else max_age)
+    return response
+
+
+def serve(request, path):
+    """Vue branchée sur MEDIA_URL"""
+    return serve_file(request, path)
+
+
+async def aserve(request, path):
+    """Équivalent async de `serve` (déploiement ASGI)"""
+    return await sync_to_async(serve_file)(request, path, asynchronous=True)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:00
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS portfolio_post_fts "
+            "USING fts5(title, content, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO portfolio_post_fts(rowid, title, content) "
+            "SELECT id, title, content FROM portfolio_post"
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "ALTER TABLE portfolio_post ADD FULLTEXT INDEX portfolio_post_fulltext (title, content)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS portfolio_post_fts")
+    elif vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE portfolio_post DROP INDEX portfolio_post_fulltext")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_siteconfig'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=255, verbose_name='Fichier original')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échec')], default='pending', max_length=10, verbose_name='Statut')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date de création')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Début du traitement')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin du traitement')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_jobs', to='portfolio.post', verbose_name='Article')),
+            ],
+            options={
+                'verbose_name': 'Traitement média',
+                'verbose_name_plural': 'Traitements média',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
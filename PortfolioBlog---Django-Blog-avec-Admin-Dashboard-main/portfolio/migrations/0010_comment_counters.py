@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:06
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('portfolio', 'Post')
+    Comment = apps.get_model('portfolio', 'Comment')
+    SiteStats = apps.get_model('portfolio', 'SiteStats')
+
+    per_post = Comment.objects.order_by().values('post').annotate(
+        approved=Count('pk', filter=Q(is_approved=True)),
+        pending=Count('pk', filter=Q(is_approved=False)),
+        latest=Max('created_at'),
+    )
+    for row in per_post:
+        Post.objects.filter(pk=row['post']).update(
+            approved_comment_count=row['approved'],
+            pending_comment_count=row['pending'],
+            last_activity_at=row['latest'],
+        )
+    SiteStats.objects.update_or_create(pk=1, defaults={
+        'total_posts': Post.objects.count(),
+        'published_posts': Post.objects.filter(is_published=True).count(),
+        'total_comments': Comment.objects.count(),
+        'pending_comments': Comment.objects.filter(is_approved=False).count(),
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_post_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_posts', models.IntegerField(default=0, verbose_name='Total articles')),
+                ('published_posts', models.IntegerField(default=0, verbose_name='Articles publiés')),
+                ('total_comments', models.IntegerField(default=0, verbose_name='Total commentaires')),
+                ('pending_comments', models.IntegerField(default=0, verbose_name='Commentaires en attente')),
+            ],
+            options={
+                'verbose_name': 'Statistiques du site',
+                'verbose_name_plural': 'Statistiques du site',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='approved_comment_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Commentaires approuvés'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Dernière activité'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='pending_comment_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Commentaires en attente'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:07
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+def render_existing_posts(apps, schema_editor):
+    Post = apps.get_model('portfolio', 'Post')
+    for post in Post.objects.only('pk', 'content').iterator():
+        Post.objects.filter(pk=post.pk).update(
+            content_html=linebreaks(post.content, autoescape=True),
+            excerpt=Truncator(post.content).words(20, truncate=' …'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Contenu HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Extrait'),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0012_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='media_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32, verbose_name='Empreinte du média'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+from portfolio import videos
+
+
+def parse_existing_videos(apps, schema_editor):
+    # Miniatures : `manage.py backfill_video_metadata` (accès réseau)
+    Post = apps.get_model('portfolio', 'Post')
+    for post in Post.objects.exclude(video_url=None).exclude(video_url='').only('pk', 'video_url').iterator():
+        video_id = videos.parse_video_id(post.video_url)
+        Post.objects.filter(pk=post.pk).update(video_id=video_id, video_embed_url=videos.embed_url(video_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0013_post_media_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediajob',
+            name='kind',
+            field=models.CharField(choices=[('image', "Compression d'image"), ('video_thumbnail', 'Miniature vidéo')], default='image', max_length=20, verbose_name='Type'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='video_embed_url',
+            field=models.URLField(blank=True, editable=False, verbose_name="URL d'intégration"),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='video_id',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=11, verbose_name='Identifiant vidéo'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='video_thumbnail',
+            field=models.FileField(blank=True, editable=False, upload_to='posts_media/video_thumbnails/', verbose_name='Miniature vidéo'),
+        ),
+        migrations.RunPython(parse_existing_videos, migrations.RunPython.noop),
+    ]
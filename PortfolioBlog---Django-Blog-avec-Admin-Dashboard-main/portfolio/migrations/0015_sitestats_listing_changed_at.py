@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0014_video_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitestats',
+            name='listing_changed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Dernier retrait d'article"),
+        ),
+    ]
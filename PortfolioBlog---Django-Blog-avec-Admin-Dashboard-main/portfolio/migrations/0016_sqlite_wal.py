@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def set_journal_mode(apps, schema_editor):
+    """Le mode de journal est enregistré dans le fichier : une seule fois suffit"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or not settings.SQLITE_JOURNAL_MODE:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}')
+
+
+class Migration(migrations.Migration):
+    # PRAGMA journal_mode est refusé à l'intérieur d'une transaction
+    atomic = False
+
+    dependencies = [
+        ('portfolio', '0015_sitestats_listing_changed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode, migrations.RunPython.noop),
+    ]
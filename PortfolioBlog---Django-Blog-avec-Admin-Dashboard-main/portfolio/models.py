@@ -3,11 +3,28 @@ import tempfile
 from io import BytesIO
 from PIL import Image
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
 from django.core.files.base import ContentFile
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+from . import videos
+from .caching import get_generations, invalidate
+from .images import check_pixels, delete_renditions
+from .storage import content_hash
+
+EXCERPT_WORDS = 20
+IMAGE_MAX_SIZE = (1600, 1600)
+# Un JPEG déjà aux bonnes dimensions et sous ce poids n'est pas réencodé
+JPEG_MAX_BYTES_PER_PIXEL = 0.35
+SITE_CONFIG_SCOPE = 'siteconfig'
+
+# [version, instance] de SiteConfig pour ce processus (voir SiteConfig.get_solo)
+_site_config = [None, None]
 
 
 class Post(models.Model):
@@ -25,31 +42,165 @@ class Post(models.Model):
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
     is_published = models.BooleanField(default=True, verbose_name="Publié")
+    # Rendu HTML et extrait précalculés à l'enregistrement (voir render_content)
+    content_html = models.TextField(blank=True, editable=False, verbose_name="Contenu HTML")
+    excerpt = models.TextField(blank=True, editable=False, verbose_name="Extrait")
+    renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Déclinaisons responsives")
+    # Empreinte MD5 du fichier envoyé : un envoi identique réutilise le fichier stocké
+    media_hash = models.CharField(max_length=32, blank=True, db_index=True, editable=False, verbose_name="Empreinte du média")
+    # Déduits de video_url à l'enregistrement (voir videos.py)
+    video_id = models.CharField(max_length=11, blank=True, db_index=True, editable=False, verbose_name="Identifiant vidéo")
+    video_embed_url = models.URLField(blank=True, editable=False, verbose_name="URL d'intégration")
+    video_thumbnail = models.FileField(upload_to=videos.THUMBNAIL_DIR, blank=True, editable=False, verbose_name="Miniature vidéo")
+    # Compteurs dénormalisés, tenus à jour par les signaux de Comment (voir counters.py)
+    approved_comment_count = models.IntegerField(default=0, editable=False, verbose_name="Commentaires approuvés")
+    pending_comment_count = models.IntegerField(default=0, editable=False, verbose_name="Commentaires en attente")
+    last_activity_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Dernière activité")
+
+    class Meta:
+        indexes = [
+            # Accueil, blog (curseur sur created_at, id) et COUNT des posts publiés.
+            # Index partiel : Django filtre `WHERE is_published` (sans `= 1`),
+            # qu'un index composite (is_published, ...) ne sait pas exploiter sur SQLite.
+            models.Index(fields=['created_at', 'id'], condition=Q(is_published=True), name='post_published_idx'),
+            # Listes de l'administration (tous les posts)
+            models.Index(fields=['created_at', 'id'], name='post_created_idx'),
+            # MAX(...) des validateurs HTTP (conditional.py)
+            models.Index(fields=['updated_at'], name='post_updated_idx'),
+            models.Index(fields=['last_activity_at'], name='post_activity_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # État chargé, pour ajuster les compteurs globaux lors d'une modification
+        instance._loaded_is_published = instance.__dict__.get('is_published')
+        instance._loaded_media = instance.__dict__.get('media')
+        return instance
+
+    def get_absolute_url(self):
+        return reverse('post_detail', args=[self.pk])
+
+    @property
+    def total_comment_count(self):
+        return self.approved_comment_count + self.pending_comment_count
+
+    @property
+    def video_thumbnail_url(self):
+        """Miniature locale, ou celle de YouTube tant qu'elle n'est pas téléchargée"""
+        if self.video_thumbnail:
+            return self.video_thumbnail.url
+        return videos.remote_thumbnail_url(self.video_id)
+
+    def set_video_metadata(self):
+        """Identifiant et URL d'intégration de video_url ; retourne True si la
+        miniature est à télécharger"""
+        video_id = videos.parse_video_id(self.video_url)
+        if video_id == self.video_id:
+            return bool(video_id) and not self.video_thumbnail
+        self.video_id = video_id
+        self.video_embed_url = videos.embed_url(video_id)
+        # Miniature déjà téléchargée pour un autre article avec la même vidéo
+        self.video_thumbnail = (
+            Post.objects.filter(video_id=video_id).exclude(pk=self.pk).exclude(video_thumbnail='')
+            .values_list('video_thumbnail', flat=True).first()
+            if video_id else None
+        ) or ''
+        return bool(video_id) and not self.video_thumbnail
+
+    def render_content(self):
+        """Équivalent de `content|linebreaks` et `content|truncatewords:20`"""
+        self.content_html = linebreaks(self.content, autoescape=True)
+        self.excerpt = Truncator(self.content).words(EXCERPT_WORDS, truncate=' …')
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'content_html', 'excerpt'}
+        needs_thumbnail = False
+        if update_fields is None or 'video_url' in update_fields:
+            needs_thumbnail = self.set_video_metadata()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'video_id', 'video_embed_url', 'video_thumbnail'}
+        needs_compression = False
         if self.media:
             ext = os.path.splitext(self.media.name)[1].lower()
             if ext in ['.jpg', '.jpeg', '.png', '.gif']:
                 self.media_type = 'image'
-                self.media = self.compress_image(self.media)
+                # Nouvel upload : l'original est enregistré tel quel, la compression
+                # est faite en arrière-plan (commande process_media_jobs)
+                needs_compression = ext != '.gif' and not self.media._committed
+                if not self.media._committed and self.renditions:
+                    # Les déclinaisons de l'ancien média ne sont plus valables,
+                    # sauf pour les autres articles qui partagent ce média
+                    if not self._media_shared(getattr(self, '_loaded_media', None)):
+                        delete_renditions(self.media.storage, self.renditions)
+                    self.renditions = {}
+                if not self.media._committed and self._reuse_identical_media():
+                    needs_compression = False
+                    if update_fields is not None:
+                        kwargs['update_fields'] = {*kwargs['update_fields'], 'renditions'}
+            if update_fields is not None and 'media' in update_fields:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'media_hash'}
         elif self.video_url:
             self.media_type = 'video'
         super().save(*args, **kwargs)
+        if needs_compression:
+            MediaJob.objects.create(post=self, source_name=self.media.name)
+        if needs_thumbnail:
+            self.queue_video_thumbnail()
+
+    def queue_video_thumbnail(self):
+        """Crée le job de téléchargement de la miniature, sauf s'il est déjà en file"""
+        jobs = self.media_jobs.filter(kind='video_thumbnail', source_name=self.video_id)
+        if jobs.filter(status__in=['pending', 'running']).exists():
+            return None
+        return MediaJob.objects.create(post=self, kind='video_thumbnail', source_name=self.video_id)
+
+    def _media_shared(self, name):
+        return bool(name) and Post.objects.filter(media=name).exclude(pk=self.pk).exists()
+
+    def _reuse_identical_media(self):
+        """Nouvel envoi : si un article a déjà ce fichier, reprend son média
+        (déjà compressé) et ses déclinaisons au lieu de le stocker à nouveau"""
+        self.media_hash = content_hash(self.media.file)
+        twin = (
+            Post.objects.filter(media_hash=self.media_hash).exclude(pk=self.pk).exclude(media='')
+            .values('media', 'renditions').first()
+        )
+        if twin is None:
+            return False
+        self.media = twin['media']
+        self.renditions = twin['renditions']
+        return True
 
     def compress_image(self, uploaded_file):
         """Compress uploaded images (JPEG/PNG) and keep GIFs unchanged.
-        Returns a ContentFile with the same or adjusted filename.
+        Returns a ContentFile with the same or adjusted filename, or the
+        original file when it is already small enough.
         """
         try:
             ext = os.path.splitext(uploaded_file.name)[1].lower()
             if ext == '.gif':
                 return uploaded_file
 
+            # Image.open ne lit que l'en-tête : dimensions et format sans décodage
             img = Image.open(uploaded_file)
+            is_jpeg = ext in ['.jpg', '.jpeg'] and img.format == 'JPEG'
+            fits = img.width <= IMAGE_MAX_SIZE[0] and img.height <= IMAGE_MAX_SIZE[1]
+            if fits and (ext == '.png' and img.format == 'PNG' or is_jpeg and (
+                    uploaded_file.size <= JPEG_MAX_BYTES_PER_PIXEL * img.width * img.height)):
+                return uploaded_file
+
+            if img.format == 'JPEG':
+                # Décodage directement à 1/2, 1/4 ou 1/8 de la taille
+                img.draft('RGB', IMAGE_MAX_SIZE)
+            check_pixels(img)
 
             # Resize to a reasonable max dimension while keeping aspect ratio
-            max_size = (1600, 1600)
-            img.thumbnail(max_size, Image.LANCZOS)
+            img.thumbnail(IMAGE_MAX_SIZE, Image.LANCZOS)
 
             buffer = BytesIO()
 
@@ -59,20 +210,60 @@ class Post(models.Model):
                 img.save(buffer, format='JPEG', quality=75, optimize=True)
                 new_name = os.path.splitext(uploaded_file.name)[0] + '.jpg'
             elif ext == '.png':
-                # Keep PNG to preserve transparency
-                img.save(buffer, format='PNG', optimize=True)
+                # Keep PNG to preserve transparency ; optimize=True est très lent
+                # sur les grandes images pour un gain de quelques pourcents
+                img.save(buffer, format='PNG', compress_level=6)
                 new_name = uploaded_file.name
             else:
                 # Unsupported types: return as-is
                 return uploaded_file
 
+            if fits and buffer.tell() >= uploaded_file.size:
+                return uploaded_file
             buffer.seek(0)
             return ContentFile(buffer.getvalue(), name=new_name)
+        except Image.DecompressionBombError:
+            # Le job échoue (erreur visible) plutôt que de garder l'original
+            raise
         except Exception:
             # On any error, fallback to original file
             return uploaded_file
 
 
+class MediaJob(models.Model):
+    """Traitement de média en attente (compression d'image, miniature de
+    vidéo), effectué par `manage.py process_media_jobs`"""
+    KIND_CHOICES = [
+        ('image', 'Compression d\'image'),
+        ('video_thumbnail', 'Miniature vidéo'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échec'),
+    ]
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='media_jobs', verbose_name="Article")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='image', verbose_name="Type")
+    # Nom du fichier original, ou identifiant de la vidéo pour une miniature
+    source_name = models.CharField(max_length=255, verbose_name="Fichier original")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentatives")
+    error = models.TextField(blank=True, verbose_name="Erreur")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Date de création")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Début du traitement")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin du traitement")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Traitement média"
+        verbose_name_plural = "Traitements média"
+
+    def __str__(self):
+        return f'{self.source_name} ({self.get_status_display()})'
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments', verbose_name="Article")
     author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Auteur")
@@ -84,10 +275,30 @@ class Comment(models.Model):
         ordering = ['created_at']
         verbose_name = "Commentaire"
         verbose_name_plural = "Commentaires"
+        indexes = [
+            # Commentaires approuvés d'un article, dans l'ordre d'affichage
+            models.Index(fields=['post', 'created_at', 'id'], condition=Q(is_approved=True), name='comment_approved_idx'),
+            # File de modération (?status=pending)
+            models.Index(fields=['created_at', 'id'], condition=Q(is_approved=False), name='comment_pending_idx'),
+            # Gestion des commentaires et derniers commentaires du dashboard
+            models.Index(fields=['created_at', 'id'], name='comment_created_idx'),
+        ]
 
     def __str__(self):
         return f'Commentaire de {self.author.username} sur {self.post.title}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = (instance.__dict__.get('post_id'), instance.__dict__.get('is_approved'))
+        instance._loaded_content = instance.__dict__.get('content')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Les compteurs (signal post_save) sont mis à jour dans la même transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -115,7 +326,47 @@ class SiteConfig(models.Model):
     def __str__(self):
         return "Configuration du site"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Les autres processus rechargent la configuration à leur prochain accès
+        transaction.on_commit(lambda: invalidate(SITE_CONFIG_SCOPE))
+
     @classmethod
-    def get_solo(cls):
+    def get_solo(cls, cached=True):
+        """Configuration unique ; gardée en mémoire du processus tant que sa
+        version (cache partagé) ne change pas. `cached=False` pour la modifier."""
+        version = get_generations([SITE_CONFIG_SCOPE])[0]
+        if cached and _site_config[0] == version:
+            return _site_config[1]
         obj, _ = cls.objects.get_or_create(pk=1)
+        if cached:
+            _site_config[:] = [version, obj]
         return obj
+
+
+class SiteStats(models.Model):
+    """Compteurs globaux du dashboard (ligne unique), voir counters.py"""
+    total_posts = models.IntegerField(default=0, verbose_name="Total articles")
+    published_posts = models.IntegerField(default=0, verbose_name="Articles publiés")
+    total_comments = models.IntegerField(default=0, verbose_name="Total commentaires")
+    pending_comments = models.IntegerField(default=0, verbose_name="Commentaires en attente")
+    # Suppression ou dépublication d'un article : aucun updated_at restant ne l'indique
+    listing_changed_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernier retrait d'article")
+
+    class Meta:
+        verbose_name = "Statistiques du site"
+        verbose_name_plural = "Statistiques du site"
+
+    def __str__(self):
+        return "Statistiques du site"
+
+    @classmethod
+    def get_solo(cls):
+        try:
+            return cls.objects.get(pk=1)
+        except cls.DoesNotExist:
+            # Ligne absente : créée avec les vrais totaux, pas avec des zéros
+            # (import local : counters importe ce module)
+            from .counters import reconcile
+            reconcile()
+            return cls.objects.get(pk=1)
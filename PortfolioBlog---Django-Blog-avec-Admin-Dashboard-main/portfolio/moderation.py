@@ -0,0 +1,63 @@
+"""Modération des commentaires en masse (dashboard et admin Django).
+
+Chaque action est une seule requête UPDATE ou DELETE sur l'ensemble
+sélectionné, sans signal par commentaire : les compteurs sont ajustés en
+bloc dans la même transaction, puis les pages en cache sont invalidées
+après le commit.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from . import caching, counters
+
+
+def _invalidate_after_commit(post_ids):
+    scopes = ['listing', *(f'post:{pk}' for pk in post_ids)]
+    transaction.on_commit(lambda: caching.invalidate(*scopes))
+
+
+def _grouped(queryset):
+    """{(post_id, is_approved): nombre} pour l'ensemble sélectionné"""
+    rows = queryset.order_by().values_list('post', 'is_approved').annotate(n=Count('pk'))
+    return {(post_id, is_approved): n for post_id, is_approved, n in rows}
+
+
+def set_approval(queryset, approved):
+    """Approuve (ou désapprouve) les commentaires ; retourne le nombre modifié"""
+    with transaction.atomic():
+        changing = queryset.filter(is_approved=not approved).select_related(None)
+        groups = _grouped(changing)
+        updated = changing.update(is_approved=approved)
+
+        sign = 1 if approved else -1
+        deltas = {post_id: [sign * n, -sign * n] for (post_id, _), n in groups.items()}
+        if updated == sum(groups.values()):
+            counters.apply_comment_deltas(deltas)
+        else:
+            # Modification concurrente entre le comptage et l'UPDATE
+            counters.reconcile()
+        _invalidate_after_commit(deltas)
+    return updated
+
+
+def delete_comments(queryset):
+    """Supprime les commentaires ; retourne le nombre supprimé"""
+    with transaction.atomic():
+        queryset = queryset.order_by().select_related(None)
+        groups = _grouped(queryset)
+        # DELETE direct (API privée) : Comment ayant des receveurs post_delete,
+        # queryset.delete() chargerait chaque commentaire et enverrait un signal
+        # par ligne, décomptant en double les compteurs ajustés ci-dessous
+        deleted = queryset._raw_delete(queryset.db)
+
+        deltas = defaultdict(lambda: [0, 0])
+        for (post_id, is_approved), n in groups.items():
+            deltas[post_id][0 if is_approved else 1] -= n
+        if deleted == sum(groups.values()):
+            counters.apply_comment_deltas(deltas)
+        else:
+            counters.reconcile()
+        _invalidate_after_commit(deltas)
+    return deleted
@@ -0,0 +1,171 @@
+import hashlib
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+COUNT_CACHE_TIMEOUT = 60  # secondes
+
+
+class CursorPage:
+    """Page obtenue par pagination par curseur (keyset sur created_at, id).
+
+    Expose la même interface que `django.core.paginator.Page` pour les
+    templates (itération, has_next, has_previous...) sans numéro de page.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def encode_cursor(direction, obj):
+    """Jeton opaque désignant la position de `obj` ('n' = suivant, 'p' = précédent)"""
+    raw = f"{direction}|{obj.created_at.isoformat()}|{obj.pk}"
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(token):
+    """Retourne (direction, created_at, pk) ou None si le jeton est invalide"""
+    try:
+        direction, created_at, pk = urlsafe_base64_decode(token).decode().split('|')
+        if direction not in ('n', 'p'):
+            return None
+        return direction, datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def keyset_ordering(descending=True):
+    return ('-created_at', '-id') if descending else ('created_at', 'id')
+
+
+def _cursor_query(queryset, token, per_page, descending):
+    """(lignes à charger, curseur décodé, sens) : `per_page + 1` lignes après/avant le curseur"""
+    cursor = decode_cursor(token) if token else None
+    forward = cursor is None or cursor[0] == 'n'
+
+    if cursor is not None:
+        _, created_at, pk = cursor
+        # Lignes situées strictement après (ou avant) la position du curseur
+        if forward == descending:
+            position = Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        else:
+            position = Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        queryset = queryset.filter(position)
+
+    ordering = keyset_ordering(descending if forward else not descending)
+    return queryset.order_by(*ordering)[:per_page + 1], cursor, forward
+
+
+def _cursor_page(rows, cursor, forward, per_page):
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if forward:
+        has_next, has_previous = has_more, cursor is not None
+    else:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor('n', rows[-1]) if has_next and rows else None,
+        previous_cursor=encode_cursor('p', rows[0]) if has_previous and rows else None,
+    )
+
+
+def cursor_paginate(queryset, token, per_page, descending=True):
+    """Charge `per_page` lignes après/avant le curseur, sans COUNT ni OFFSET"""
+    rows, cursor, forward = _cursor_query(queryset, token, per_page, descending)
+    return _cursor_page(list(rows), cursor, forward, per_page)
+
+
+async def acursor_paginate(queryset, token, per_page, descending=True):
+    rows, cursor, forward = _cursor_query(queryset, token, per_page, descending)
+    return _cursor_page([obj async for obj in rows.aiterator()], cursor, forward, per_page)
+
+
+def _count_key(queryset):
+    return 'count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """COUNT(*) mis en cache quelques secondes : le total affiché est approximatif"""
+    key = _count_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+async def acached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    key = _count_key(queryset)
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, timeout)
+    return count
+
+
+def paginate(request, queryset, per_page, descending=True, with_count=False):
+    """Pagine un queryset en ne chargeant que les lignes de la page demandée.
+
+    `?page=N` conserve la pagination numérotée classique ; sinon la
+    pagination par curseur (`?cursor=...`) est utilisée. `with_count` ajoute
+    un total mis en cache au lieu d'un COUNT(*) à chaque requête.
+    """
+    queryset = queryset.order_by(*keyset_ordering(descending))
+
+    if 'page' in request.GET:
+        paginator = Paginator(queryset, per_page)
+        if with_count:
+            paginator.count = cached_count(queryset)
+        page = paginator.get_page(request.GET.get('page'))
+        page.object_list = list(page.object_list)
+    else:
+        page = cursor_paginate(queryset, request.GET.get('cursor'), per_page, descending)
+        if with_count:
+            page.count = cached_count(queryset)
+    return page
+
+
+async def apaginate(request, queryset, per_page, descending=True, with_count=False):
+    """Version async de `paginate`, pour les vues ASGI (voir async_views.py)"""
+    queryset = queryset.order_by(*keyset_ordering(descending))
+
+    if 'page' in request.GET:
+        paginator = Paginator(queryset, per_page)
+        # Le total est toujours fourni : Paginator.count ferait un COUNT synchrone
+        paginator.count = await (acached_count(queryset) if with_count else queryset.acount())
+        page = paginator.get_page(request.GET.get('page'))
+        page.object_list = [obj async for obj in page.object_list.aiterator()]
+    else:
+        page = await acursor_paginate(queryset, request.GET.get('cursor'), per_page, descending)
+        if with_count:
+            page.count = await acached_count(queryset)
+    return page
@@ -0,0 +1,157 @@
+"""Limitation de débit des écritures (commentaires, inscription, connexion).
+
+Un seau à jetons par route et par utilisateur (adresse IP pour un visiteur
+anonyme) : `burst` jetons au plus, rechargés au rythme de `rate`. Chaque
+requête limitée consomme un jeton ; seau vide : 429 avec Retry-After, avant
+que la vue ne valide le formulaire ou ne hache un mot de passe.
+
+Les limites sont déclarées par nom d'URL (`RATE_LIMITS` de portfolio/urls.py)
+et posées sur les vues par `apply`. L'état est stocké dans le cache
+`RATE_LIMIT_CACHE`, partagé entre processus ; si ce cache ne conserve rien
+(DummyCache) ou échoue, un dictionnaire borné propre au processus prend le
+relais. Lecture puis écriture sans verrou : sous forte concurrence, quelques
+requêtes de plus peuvent passer.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+MEMORY_BUCKETS = 10_000
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Limit:
+    """`rate` de la forme '10/m', '5/h' ou '3/10s' ; `burst` : taille du seau
+    (par défaut, le nombre de requêtes de la période)"""
+    rate: str
+    burst: int = None
+    methods: tuple = ('POST',)
+
+    def __post_init__(self):
+        match = RATE_RE.match(self.rate)
+        if not match:
+            raise ValueError(f"Débit invalide : {self.rate!r}")
+        count, multiplier, unit = match.groups()
+        period = int(multiplier or 1) * PERIODS[unit]
+        object.__setattr__(self, 'per_second', int(count) / period)
+        object.__setattr__(self, 'capacity', self.burst or int(count))
+
+    @property
+    def refill_time(self):
+        """Secondes pour remplir un seau vide"""
+        return self.capacity / self.per_second
+
+
+def _take(state, now, limit):
+    """(nouvel état ou None si refusé, attente en secondes)"""
+    tokens, updated = state or (limit.capacity, now)
+    tokens = min(limit.capacity, tokens + (now - updated) * limit.per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return None, (1 - tokens) / limit.per_second
+
+
+def _shared_cache():
+    backend = caches[settings.RATE_LIMIT_CACHE]
+    return None if isinstance(backend, DummyCache) else backend
+
+
+def consume(key, limit):
+    """Prend un jeton du seau `key` ; retourne 0, ou l'attente avant le prochain jeton"""
+    now = time.time()
+    backend = _shared_cache()
+    if backend is not None:
+        try:
+            state, wait = _take(backend.get(key), now, limit)
+            if state is not None:
+                backend.set(key, state, math.ceil(limit.refill_time) + 1)
+            return wait
+        except Exception:
+            logger.warning("Cache de limitation indisponible, repli en mémoire", exc_info=True)
+    with _memory_lock:
+        state, wait = _take(_memory.get(key), now, limit)
+        if state is not None:
+            _memory[key] = state
+            _memory.move_to_end(key)
+            while len(_memory) > MEMORY_BUCKETS:
+                _memory.popitem(last=False)
+    return wait
+
+
+def reset():
+    with _memory_lock:
+        _memory.clear()
+
+
+def client_ip(request):
+    header = settings.RATE_LIMIT_IP_HEADER
+    if header and request.headers.get(header):
+        # Dernière adresse : celle ajoutée par le proxy de confiance
+        return request.headers[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _bucket_key(request, name, user):
+    who = f'u{user.pk}' if user.is_authenticated else f'ip:{client_ip(request)}'
+    return f'rl:{name}:{who}'
+
+
+def too_many_requests(wait):
+    response = HttpResponse("Trop de requêtes, réessayez plus tard.\n", status=429,
+                            content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(max(1, math.ceil(wait)))
+    return response
+
+
+def rate_limit(name, limit):
+    """Décorateur : limite les requêtes `limit.methods` de la route `name`"""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if settings.RATE_LIMIT_ENABLED and request.method in limit.methods:
+                    key = _bucket_key(request, name, await request.auser())
+                    wait = await sync_to_async(consume)(key, limit)
+                    if wait:
+                        return too_many_requests(wait)
+                return await view(request, *args, **kwargs)
+            async_wrapper.rate_limit = limit
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED and request.method in limit.methods:
+                wait = consume(_bucket_key(request, name, request.user), limit)
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        wrapper.rate_limit = limit
+        return wrapper
+    return decorator
+
+
+def apply(urlpatterns, limits):
+    """Pose la limite de chaque nom d'URL de `limits` sur la vue correspondante"""
+    for pattern in urlpatterns:
+        limit = limits.get(getattr(pattern, 'name', None))
+        if limit and not hasattr(pattern.callback, 'rate_limit'):
+            pattern.callback = rate_limit(pattern.name, limit)(pattern.callback)
+    return urlpatterns
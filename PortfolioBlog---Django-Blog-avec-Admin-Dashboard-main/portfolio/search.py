@@ -0,0 +1,205 @@
+"""Recherche plein texte des articles.
+
+SQLite : table virtuelle FTS5 `portfolio_post_fts` (rowid = id du post),
+tenue à jour par les signaux de `Post` (voir signals.py).
+MySQL : index FULLTEXT sur (title, content), maintenu par le moteur.
+Autres bases (ou FTS5 indisponible) : repli sur `icontains`.
+"""
+import re
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = 'portfolio_post_fts'
+MYSQL_INDEX = 'portfolio_post_fulltext'
+SNIPPET_WORDS = 24
+
+# Marqueurs de surlignage remplacés par <mark> après échappement HTML
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+_fts_available = {}
+
+
+def backend():
+    """Retourne 'sqlite', 'mysql' ou None (repli sur LIKE)"""
+    if connection.vendor == 'mysql':
+        return 'mysql'
+    if connection.vendor == 'sqlite':
+        name = connection.settings_dict['NAME']
+        if name not in _fts_available:
+            _fts_available[name] = FTS_TABLE in connection.introspection.table_names()
+        if _fts_available[name]:
+            return 'sqlite'
+    return None
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query.lower())[:10]
+
+
+def _fts_query(terms):
+    # Chaque terme est cité (pas d'injection de syntaxe FTS) et préfixé par *
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _mysql_query(terms):
+    return ' '.join(f'+{term}*' for term in terms)
+
+
+def _highlight(text):
+    """Échappe le HTML du snippet puis remplace les marqueurs par <mark>"""
+    html = escape(text).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def make_snippet(text, terms, size=SNIPPET_WORDS):
+    """Extrait calculé en Python (MySQL et repli LIKE) autour du premier terme trouvé"""
+    words = text.split()
+    matches = [
+        i for i, word in enumerate(words)
+        if any(re.sub(r'\W', '', word.lower()).startswith(term) for term in terms)
+    ]
+    start = max(0, matches[0] - size // 3) if matches else 0
+    parts = []
+    for i, word in enumerate(words[start:start + size], start):
+        parts.append(f'{_MARK_START}{word}{_MARK_END}' if i in matches else word)
+    snippet = ' '.join(parts)
+    if start > 0:
+        snippet = '…' + snippet
+    if start + size < len(words):
+        snippet += '…'
+    return _highlight(snippet)
+
+
+def _match_sql(engine, terms):
+    """(FROM ... WHERE ..., ORDER BY ..., paramètres) des posts publiés correspondant aux termes"""
+    if engine == 'sqlite':
+        return (f"FROM {FTS_TABLE} f JOIN portfolio_post p ON p.id = f.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s AND p.is_published",
+                f"bm25({FTS_TABLE}, 10.0, 1.0)", [_fts_query(terms)])
+    match = "MATCH(title, content) AGAINST (%s IN BOOLEAN MODE)"
+    return (f"FROM portfolio_post p WHERE p.is_published AND {match}",
+            f"{match} DESC", [_mysql_query(terms)])
+
+
+def _like_queryset(terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(content__icontains=term)
+    return Post.objects.filter(condition, is_published=True)
+
+
+def ranked_ids(terms, limit=None, offset=0):
+    """Identifiants des posts publiés correspondant aux termes, du plus au moins
+    pertinent : tous, ou `limit` à partir du rang `offset`"""
+    engine = backend()
+    if engine is None:
+        ids = _like_queryset(terms).order_by('-created_at', '-id').values_list('id', flat=True)
+        return list(ids if limit is None else ids[offset:offset + limit])
+
+    where, order, params = _match_sql(engine, terms)
+    if engine == 'mysql':
+        params = params * 2  # AGAINST répété dans ORDER BY
+    sql = f"SELECT p.id {where} ORDER BY {order}"
+    if limit is not None:
+        sql += " LIMIT %s OFFSET %s"
+        params = [*params, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def match_count(terms):
+    """Nombre total de posts publiés correspondant aux termes"""
+    engine = backend()
+    if engine is None:
+        return _like_queryset(terms).count()
+    where, _, params = _match_sql(engine, terms)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) {where}", params)
+        return cursor.fetchone()[0]
+
+
+class RankedResults:
+    """Résultats pour Paginator : total par COUNT, seuls les ids de la page
+    demandée sont classés et lus (aucune limite sur le nombre de pages)"""
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def count(self):
+        return match_count(self.terms) if self.terms else 0
+
+    def __getitem__(self, index):
+        start = index.start or 0
+        if not self.terms or index.stop <= start:
+            return []
+        return ranked_ids(self.terms, limit=index.stop - start, offset=start)
+
+
+def snippets(post_ids, terms, posts):
+    """Extraits surlignés pour les posts de la page courante uniquement"""
+    if backend() == 'sqlite' and post_ids:
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, 1, %s, %s, '…', %s) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})",
+                [_MARK_START, _MARK_END, SNIPPET_WORDS, _fts_query(terms), *post_ids],
+            )
+            return {pk: _highlight(text) for pk, text in cursor.fetchall()}
+    return {post.pk: make_snippet(post.content, terms) for post in posts}
+
+
+def search_page(request, query, per_page):
+    """Page de résultats classés par pertinence, avec `search_snippet` sur chaque post"""
+    terms = get_terms(query)
+    page = Paginator(RankedResults(terms), per_page).get_page(request.GET.get('page'))
+    # `content` reste chargé : make_snippet en a besoin hors SQLite
+    posts_by_id = Post.objects.select_related('author').defer('content_html').in_bulk(page.object_list)
+    posts = [posts_by_id[pk] for pk in page.object_list if pk in posts_by_id]
+    found = snippets([post.pk for post in posts], terms, posts)
+    for post in posts:
+        post.search_snippet = found.get(post.pk)
+    page.object_list = posts
+    return page
+
+
+def index_post(post):
+    """Met à jour la ligne FTS du post (SQLite uniquement, MySQL s'en charge seul)"""
+    if backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (%s, %s, %s)",
+            [post.pk, post.title, post.content],
+        )
+
+
+def unindex_post(pk):
+    if backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+
+def rebuild_index():
+    """Reconstruit entièrement l'index ; retourne le nombre de posts indexés"""
+    engine = backend()
+    with connection.cursor() as cursor:
+        if engine == 'sqlite':
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, content) "
+                f"SELECT id, title, content FROM portfolio_post"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        elif engine == 'mysql':
+            cursor.execute("OPTIMIZE TABLE portfolio_post")
+    return Post.objects.count()
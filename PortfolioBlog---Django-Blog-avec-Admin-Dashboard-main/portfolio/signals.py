@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, counters, fragments, search, sitemaps
+from .models import Comment, Post
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """Réindexe le post lorsque son titre ou son contenu peut avoir changé"""
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        return
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    caching.invalidate('listing', f'post:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_sitemap(sender, instance, **kwargs):
+    sitemaps.invalidate_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    # Les cartes des listes affichent le nombre de commentaires
+    caching.invalidate('listing', f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Post)
+def update_post_counters(sender, instance, created, **kwargs):
+    counters.post_saved(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_post_counters(sender, instance, **kwargs):
+    counters.post_deleted(instance)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_counters(sender, instance, created, **kwargs):
+    counters.comment_saved(instance, created)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_counters(sender, instance, **kwargs):
+    counters.comment_deleted(instance)
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_edited_comment(sender, instance, created, **kwargs):
+    """Le fragment d'un commentaire ne dépend que de (pk, is_approved) : un texte
+    modifié (admin Django) doit l'invalider"""
+    if not created and getattr(instance, '_loaded_content', None) != instance.content:
+        caching.invalidate(fragments.FRAGMENT_SCOPE)
+    instance._loaded_content = instance.content
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_fragments(sender, instance, created, update_fields=None, **kwargs):
+    """Les cartes et commentaires affichent le nom de l'auteur"""
+    if created or (update_fields is not None and not {'username', 'first_name', 'last_name'} & set(update_fields)):
+        return  # connexion (last_login) ou nouvel utilisateur sans contenu
+    caching.invalidate(fragments.FRAGMENT_SCOPE, 'listing')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Applique SQLITE_PRAGMAS (synchronous, busy_timeout...) à chaque nouvelle connexion"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -1,24 +1,184 @@
+"""Sitemap : index (`sitemap.xml`) et une section par type de page.
+
+Les articles sont découpés en tranches d'identifiants (`PostSitemap.limit`
+ids par tranche) : un article ne change jamais de tranche, donc sa
+modification n'invalide que sa tranche et l'index. Chaque tranche est
+générée en flux puis mise en cache (générations, voir caching.py).
+"""
+import hashlib
+from itertools import islice
+from math import ceil
+
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.urls import reverse
-from .models import Post  # موديل المقالات (عدّل الاسم إذا كان مختلف)
+from django.utils.functional import cached_property
+from django.utils.html import escape
+
+from . import caching
+from .models import Post
+
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24  # secondes
+LASTMOD_KEY = 'sitemap:posts:lastmod'
+PAGES_KEY = 'sitemap:posts:pages'
+URLS_PER_WRITE = 1000  # URLs envoyées par morceau de la réponse en flux
+
 
 class StaticViewSitemap(Sitemap):
     changefreq = "monthly"
     priority = 0.6
 
     def items(self):
-        # أسماء الـ URL patterns التي لها name في urls.py
+        # Noms des URL patterns des pages statiques
         return ['home', 'blog']
 
     def location(self, item):
         return reverse(item)
 
+
+class IdRangePaginator(Paginator):
+    """Page n = objets dont l'id est dans ](n - 1) * per_page, n * per_page]"""
+
+    @cached_property
+    def num_pages(self):
+        # Relu à chaque tranche demandée : mis en cache, effacé par invalidate_post
+        return cache.get_or_set(f'{PAGES_KEY}:{self.per_page}', self._count_pages, SITEMAP_CACHE_TIMEOUT)
+
+    def _count_pages(self):
+        last = self.object_list.aggregate(last=Max('pk'))['last']
+        return max(1, ceil(last / self.per_page)) if last else 1
+
+    def page(self, number):
+        number = self.validate_number(number)
+        start = (number - 1) * self.per_page
+        object_list = self.object_list.filter(pk__gt=start, pk__lte=start + self.per_page)
+        return self._get_page(object_list, number, self)
+
+
 class PostSitemap(Sitemap):
     changefreq = "monthly"
-    priority = 0.8  # أعلى من الصفحات الثابتة
+    priority = 0.8  # plus haute que les pages statiques
+    limit = 50000  # maximum d'URLs par sitemap (protocole sitemaps.org)
+
     def items(self):
-        return Post.objects.all()
+        # Seulement les colonnes utiles, pas les instances complètes
+        return Post.objects.filter(is_published=True).order_by('pk').values('pk', 'updated_at')
+
+    @property
+    def paginator(self):
+        return IdRangePaginator(self.items(), self.limit)
+
+    def location(self, item):
+        return reverse('post_detail', args=[item['pk']])
+
+    def lastmod(self, item):
+        return item['updated_at']
+
+    def get_latest_lastmod(self):
+        return cache.get_or_set(
+            LASTMOD_KEY,
+            lambda: self.items().aggregate(latest=Max('updated_at'))['latest'],
+            SITEMAP_CACHE_TIMEOUT,
+        )
+
+    @classmethod
+    def chunk(cls, pk):
+        return (pk - 1) // cls.limit + 1
+
+
+SITEMAPS = {
+    'static': StaticViewSitemap,
+    'posts': PostSitemap,
+}
+
+
+def invalidate_post(pk):
+    """À appeler quand un article change : seule sa tranche est régénérée"""
+    cache.delete_many([LASTMOD_KEY, f'{PAGES_KEY}:{PostSitemap.limit}'])
+    caching.invalidate('sitemap:index', f'sitemap:posts:{PostSitemap.chunk(pk)}')
+
+
+def _cache_key(request, name, scope):
+    generation = caching.get_generations([scope])[0]
+    # Les URLs sont absolues : le domaine fait partie de la clé
+    origin = hashlib.md5(f'{request.scheme}://{request.get_host()}'.encode()).hexdigest()
+    return f'{name}:{generation}:{origin}'
+
+
+def _value(site, name, item):
+    """Attribut de sitemap (valeur fixe ou méthode appelée avec l'objet)"""
+    value = getattr(site, name, None)
+    return value(item) if callable(value) else value
+
+
+def _url_entry(site, item, origin):
+    parts = [f"<loc>{escape(origin + site.location(item))}</loc>"]
+    lastmod = _value(site, 'lastmod', item)
+    if lastmod:
+        parts.append(f"<lastmod>{lastmod.isoformat()}</lastmod>")
+    changefreq = _value(site, 'changefreq', item)
+    if changefreq:
+        parts.append(f"<changefreq>{changefreq}</changefreq>")
+    priority = _value(site, 'priority', item)
+    if priority is not None:
+        parts.append(f"<priority>{priority}</priority>")
+    return f"<url>{''.join(parts)}</url>\n"
+
+
+def _stream_urlset(site, items, origin, key):
+    """Produit le XML par morceaux au fil de la lecture des objets, et le
+    met en cache une fois complet"""
+    written = []
+
+    def emit(text):
+        written.append(text)
+        return text
+
+    if hasattr(items, 'iterator'):
+        items = items.iterator(chunk_size=URLS_PER_WRITE)
+    items = iter(items)
+    yield emit('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    while batch := list(islice(items, URLS_PER_WRITE)):
+        yield emit(''.join(_url_entry(site, item, origin) for item in batch))
+    yield emit('</urlset>\n')
+    cache.set(key, ''.join(written), SITEMAP_CACHE_TIMEOUT)
+
+
+def index(request):
+    """Index des sitemaps : une entrée par section et par tranche"""
+    key = _cache_key(request, 'sitemap:index', 'sitemap:index')
+    content = cache.get(key)
+    if content is None:
+        response = sitemap_views.index(request, SITEMAPS, sitemap_url_name='sitemap_section')
+        content = response.render().content
+        cache.set(key, content, SITEMAP_CACHE_TIMEOUT)
+    return HttpResponse(content, content_type='application/xml')
+
+
+def section(request, section):
+    """Une tranche de sitemap (`?p=<n>`), servie depuis le cache si possible"""
+    if section not in SITEMAPS:
+        raise Http404
+    site = SITEMAPS[section]()
+    paginator = site.paginator
+    # Page validée avant de créer sa génération : un `p` arbitraire n'écrit rien en cache
+    try:
+        page = paginator.validate_number(request.GET.get('p', 1))
+    except (EmptyPage, PageNotAnInteger):
+        raise Http404("Page de sitemap inexistante")
+    scope = f'sitemap:{section}:{page}'
+    key = _cache_key(request, scope, scope)
+    content = cache.get(key)
+    if content is not None:
+        return HttpResponse(content, content_type='application/xml')
 
-    def lastmod(self, obj):
-        # تعديل آخر مرة تم تعديل البوست
-        return obj.updated_at  # تأكد أن عندك الحقل updated_at في الموديل
+    items = paginator.page(page).object_list
+    # Les objets de la tranche sont lus pendant l'envoi, pas chargés d'avance
+    origin = f'{site.get_protocol(request.scheme)}://{site.get_domain(get_current_site(request))}'
+    return StreamingHttpResponse(_stream_urlset(site, items, origin, key), content_type='application/xml')
@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle : fichiers .br seulement si installée
+    brotli = None
+
+HASH_LENGTH = 12
+# photo.3f2a9c1b0d4e(.jpg), ou photo.3f2a9c1b0d4e_AbC12xy si le nom existait déjà
+HASHED_ROOT_RE = re.compile(r'\.[0-9a-f]{%d}(?:_[A-Za-z0-9]{7})?$' % HASH_LENGTH)
+# Fichiers statiques texte qui gagnent à être précompressés
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html', '.ico'}
+MIN_COMPRESSION_RATIO = 0.95  # variante gardée si elle fait moins de 95 % de l'original
+
+
+def is_hashed_name(name):
+    return bool(HASHED_ROOT_RE.search(os.path.splitext(name)[0]))
+
+
+def content_hash(content):
+    """Empreinte MD5 (hexadécimale) du contenu d'un fichier, relu depuis le début"""
+    if not hasattr(content, 'chunks'):
+        content = File(content)
+    hasher = hashlib.md5(usedforsecurity=False)
+    content.seek(0)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """Stockage des médias qui ajoute une empreinte du contenu au nom du fichier.
+
+    Une URL ne désigne jamais deux contenus différents : elle peut être mise
+    en cache indéfiniment par les navigateurs (voir mediafiles.py).
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = content_hash(content)
+
+        directory, filename = os.path.split(name)
+        root, ext = os.path.splitext(filename)
+        root = HASHED_ROOT_RE.sub('', root)  # pas de double empreinte après un retraitement
+        suffix = f'.{digest[:HASH_LENGTH]}{ext}'
+        if max_length:
+            # Raccourcit le nom d'origine plutôt que l'empreinte
+            root = root[:max(1, max_length - len(directory) - len(suffix) - 1)]
+        return super().save(os.path.join(directory, root + suffix), content, max_length)
+
+
+def precompressed_variants():
+    """(Content-Encoding, extension) des variantes, de la plus efficace à la moins efficace"""
+    return ([('br', '.br')] if brotli else []) + [('gzip', '.gz')]
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)  # mtime=0 : sortie reproductible
+
+
+class PrecompressedManifestStorage(ManifestStaticFilesStorage):
+    """Fichiers statiques avec empreinte (manifeste) et variantes .gz/.br.
+
+    collectstatic écrit à côté de chaque fichier texte sa version gzip (et
+    brotli si le module est installé), servies par assets.py selon
+    Accept-Encoding.
+    """
+    manifest_strict = False  # fichier absent du manifeste : URL sans empreinte
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Fichier introuvable (pas encore collecté) : URL non versionnée
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in {*paths, *self.hashed_files.values()}:
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS and self.exists(name):
+                self.write_variants(name)
+
+    def write_variants(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        for encoding, suffix in precompressed_variants():
+            target = path + suffix
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                continue
+            compressed = _compress(data, encoding)
+            if len(compressed) < len(data) * MIN_COMPRESSION_RATIO:
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+            elif os.path.exists(target):
+                os.remove(target)
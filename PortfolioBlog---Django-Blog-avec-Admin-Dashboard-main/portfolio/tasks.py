@@ -0,0 +1,153 @@
+"""File de traitement des médias stockée en base (sans broker externe).
+
+Les jobs `MediaJob` sont créés par `Post.save()` et consommés par
+`manage.py process_media_jobs`.
+"""
+import logging
+import os
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import caching, images, sitemaps, videos
+from .models import MediaJob, Post
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+
+
+def claim_next_job():
+    """Réserve le plus ancien job en attente ; l'UPDATE conditionnel évite
+    qu'un même job soit pris par deux workers"""
+    candidates = MediaJob.objects.filter(status='pending').order_by('created_at', 'id')
+    for job_id in candidates.values_list('id', flat=True)[:10]:
+        claimed = MediaJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', started_at=timezone.now()
+        )
+        if claimed:
+            return MediaJob.objects.select_related('post').get(pk=job_id)
+    return None
+
+
+def requeue_stale_jobs():
+    """Remet en attente les jobs d'un worker interrompu en cours de traitement"""
+    return MediaJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - STALE_AFTER
+    ).update(status='pending')
+
+
+def retry_failed_jobs():
+    return MediaJob.objects.filter(status='failed', attempts__lt=MAX_ATTEMPTS).update(
+        status='pending', error=''
+    )
+
+
+def invalidate_posts(pks):
+    caching.invalidate('listing', *[f'post:{pk}' for pk in pks])
+    for pk in pks:
+        sitemaps.invalidate_post(pk)
+
+
+def compress_media(post, source_name):
+    """Remplace le média par sa version compressée ; retourne le nom final
+    du fichier, ou None si le média a changé entre-temps"""
+    storage = post.media.storage
+    with storage.open(source_name, 'rb') as original:
+        original.name = source_name
+        processed = post.compress_image(original)
+        if processed is original:
+            return source_name
+        filename = post.media.field.generate_filename(post, os.path.basename(processed.name))
+        new_name = storage.save(filename, processed)
+
+    # Ne remplace le média que s'il n'a pas changé pendant le traitement ; les
+    # articles qui ont reçu le même fichier (Post.media_hash) le partagent
+    sharing = Post.objects.filter(media=source_name)
+    pks = list(sharing.values_list('pk', flat=True))
+    swapped = sharing.update(media=new_name, updated_at=timezone.now())
+    if not swapped:
+        storage.delete(new_name)
+        return None
+    storage.delete(source_name)
+    invalidate_posts(pks)
+    return new_name
+
+
+def refresh_renditions(post):
+    """(Re)génère les déclinaisons responsives du média actuel du post"""
+    storage = post.media.storage
+    manifest = images.generate_renditions(post.media)
+    sharing = Post.objects.filter(media=post.media.name)
+    pks = list(sharing.values_list('pk', flat=True))
+    updated = sharing.update(renditions=manifest, updated_at=timezone.now())
+    if updated:
+        invalidate_posts(pks)
+        images.delete_renditions(storage, post.renditions)
+        post.renditions = manifest
+    else:
+        images.delete_renditions(storage, manifest)
+    return manifest
+
+
+def store_video_thumbnail(post, video_id):
+    """Associe la miniature de la vidéo à tous les articles qui l'intègrent
+    (téléchargée si aucun ne l'a encore) ; retourne le nom du fichier, ou
+    None si la vidéo a changé"""
+    if post.video_id != video_id:
+        return None
+    field = post.video_thumbnail.field
+    name = (
+        Post.objects.filter(video_id=video_id).exclude(video_thumbnail='')
+        .values_list('video_thumbnail', flat=True).first()
+    )
+    downloaded = name is None
+    if downloaded:
+        content = videos.fetch_thumbnail(video_id)
+        name = field.storage.save(field.generate_filename(post, content.name), content)
+    sharing = Post.objects.filter(video_id=video_id, video_thumbnail='')
+    pks = list(sharing.values_list('pk', flat=True))
+    if not sharing.update(video_thumbnail=name, updated_at=timezone.now()):
+        if downloaded and not Post.objects.filter(video_thumbnail=name).exists():
+            field.storage.delete(name)
+            return None
+    invalidate_posts(pks)
+    return name
+
+
+def process_job(job):
+    """Compresse le fichier original, remplace le média du post puis génère
+    ses déclinaisons responsives ; ou télécharge la miniature d'une vidéo"""
+    job.attempts += 1
+    post = job.post
+    try:
+        if job.kind == 'video_thumbnail':
+            store_video_thumbnail(post, job.source_name)
+        # Si le média a été remplacé depuis, le job du nouvel upload s'en occupe
+        elif post.media.name == job.source_name:
+            final_name = compress_media(post, job.source_name)
+            if final_name:
+                post.media.name = final_name
+                refresh_renditions(post)
+        job.status = 'done'
+    except Exception as exc:
+        logger.exception("Échec du traitement de %s", job.source_name)
+        job.status = 'failed'
+        job.error = str(exc)
+    finally:
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'error', 'finished_at'])
+    return job
+
+
+def run_pending(limit=None):
+    """Traite les jobs en attente ; retourne le nombre de jobs traités"""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        process_job(job)
+        processed += 1
+    return processed
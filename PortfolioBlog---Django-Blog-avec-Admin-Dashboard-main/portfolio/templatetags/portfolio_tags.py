@@ -0,0 +1,53 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from .. import fragments
+from ..images import MODERN_FORMATS
+
+register = template.Library()
+
+CARD_SIZES = "(min-width: 992px) 33vw, (min-width: 768px) 50vw, 100vw"
+
+
+def _srcset(storage, sources):
+    return ', '.join(f'{storage.url(name)} {width}w' for name, width in sources)
+
+
+@register.simple_tag
+def responsive_image(post, sizes=CARD_SIZES, css_class='', style='', alt=None, loading='lazy'):
+    """<picture> avec les déclinaisons AVIF/WebP/JPEG du média du post.
+
+    Sans manifeste (image pas encore traitée), retourne un simple <img>.
+    """
+    alt = post.title if alt is None else alt
+    manifest = post.renditions or {}
+    sources = manifest.get('sources')
+    if not sources:
+        return format_html(
+            '<img src="{}" class="{}" style="{}" alt="{}" loading="{}" decoding="async">',
+            post.media.url, css_class, style, alt, loading,
+        )
+
+    storage = post.media.storage
+    fallback_sources = sources.get('image/png') or sources['image/jpeg']
+    modern = [(mime, sources[mime]) for mime, *_ in MODERN_FORMATS if mime in sources]
+    source_tags = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, _srcset(storage, items), sizes) for mime, items in modern),
+    )
+    return format_html(
+        '<picture style="display: contents">{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" '
+        'class="{}" style="{}" alt="{}" loading="{}" decoding="async"></picture>',
+        source_tags,
+        storage.url(fallback_sources[-1][0]),
+        _srcset(storage, fallback_sources),
+        sizes,
+        manifest['width'], manifest['height'],
+        css_class, style, alt, loading,
+    )
+
+
+@register.simple_tag
+def cached_fragments(objects, template_name, kind):
+    """Rend `template_name` pour chaque objet via le cache de fragments (fragments.py)"""
+    return fragments.render_many(objects, template_name, kind)
@@ -1,3 +1,1194 @@
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage import default_storage as message_storage
+from django.contrib.sessions.models import Session
+from django.conf import settings
+from django.db import connection, connections
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template.loader import get_template
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from . import caching, counters, instrumentation, ratelimit, search, tasks, videos
+from .models import Post, Comment, MediaJob, SiteConfig, SiteStats
+from .benchmarks import seed_benchmark_data
+from .pagination import cursor_paginate, encode_cursor, paginate
+from .sitemaps import PostSitemap
+
+SESSION_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-sessions'}
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}, 'sessions': SESSION_CACHE}
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+               'sessions': SESSION_CACHE}
+
+
+@override_settings(CACHES=NO_CACHE)
+class QueryCountTests(TestCase):
+    """Le nombre de requêtes SQL d'une page ne doit pas dépendre du nombre de lignes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True, is_superuser=True)
+        cls.post = cls.add_posts(1)[0]
+
+    @classmethod
+    def add_posts(cls, count):
+        posts = []
+        for i in range(count):
+            author = User.objects.create_user(f'auteur{Post.objects.count()}', first_name='Auteur')
+            post = Post.objects.create(title=f'Article {i}', content='Contenu de test', author=author)
+            cls.add_comments(post, 2)
+            posts.append(post)
+        return posts
+
+    @classmethod
+    def add_comments(cls, post, count):
+        for i in range(count):
+            author = User.objects.create_user(f'lecteur{Comment.objects.count()}')
+            Comment.objects.create(post=post, author=author, content='Commentaire', is_approved=i % 2 == 0)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, urls, grow):
+        before = {url: self.count_queries(url) for url in urls}
+        grow()
+        for url in urls:
+            with self.subTest(url=url):
+                after = self.count_queries(url)
+                self.assertEqual(before[url], after, f"{url} : {before[url]} requêtes puis {after} après ajout de lignes")
+
+    def test_public_listings(self):
+        urls = [reverse('home'), reverse('blog'), reverse('blog') + '?page=1',
+                reverse('blog') + '?search=article']
+        self.assertConstantQueries(urls, lambda: self.add_posts(5))
+
+    def test_post_detail(self):
+        urls = [reverse('post_detail', args=[self.post.pk])]
+        self.assertConstantQueries(urls, lambda: self.add_comments(self.post, 10))
+
+    def test_admin_pages(self):
+        self.client.force_login(self.admin)
+        urls = [reverse('admin_dashboard'), reverse('admin_posts'), reverse('admin_comments'),
+                reverse('admin:portfolio_post_changelist'),
+                reverse('admin:portfolio_comment_changelist')]
+        self.assertConstantQueries(urls, lambda: self.add_posts(5))
+
+
+@override_settings(CACHES=NO_CACHE)
+class ConditionalGetTests(TestCase):
+    """Un client qui possède déjà la page reçoit un 304 sans rendu ni requête principale"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('auteur')
+        cls.post = Post.objects.create(title='Article', content='Contenu', author=cls.author)
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        return first['ETag']
+
+    def test_not_modified(self):
+        for url in [reverse('home'), reverse('blog'), reverse('post_detail', args=[self.post.pk]),
+                    '/sitemap.xml']:
+            with self.subTest(url=url):
+                etag = self.revalidate(url)
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_comment_changes_validators(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        etag = self.revalidate(url)
+        Comment.objects.create(post=self.post, author=self.author, content='Nouveau')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleted_post_changes_listing(self):
+        other = Post.objects.create(title='Autre', content='Contenu', author=self.author)
+        etag = self.revalidate(reverse('blog'))
+        other.delete()
+        self.assertEqual(self.client.get(reverse('blog'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_removed_post_changes_last_modified(self):
+        other = Post.objects.create(title='Autre', content='Contenu', author=self.author)
+        urls = [reverse('blog'), '/sitemap.xml']
+        last_modified = {url: self.client.get(url)['Last-Modified'] for url in urls}
+        later = timezone.now() + timedelta(seconds=5)
+        with mock.patch('portfolio.counters.timezone.now', return_value=later):
+            other.is_published = False
+            other.save()
+        for url in urls:
+            with self.subTest(url=url, change='dépublication'):
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified[url]).status_code, 200)
+
+        last_modified = {url: self.client.get(url)['Last-Modified'] for url in urls}
+        with mock.patch('portfolio.counters.timezone.now', return_value=later + timedelta(seconds=5)):
+            other.delete()
+        for url in urls:
+            with self.subTest(url=url, change='suppression'):
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified[url]).status_code, 200)
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_cache_invalidation_changes_etag(self):
+        cache.clear()
+        urls = [reverse('blog'), reverse('post_detail', args=[self.post.pk])]
+        etags = {url: self.revalidate(url) for url in urls}
+        # Renommage : aucune colonne de Post ne change, seules les générations
+        self.author.first_name = 'Ada'
+        self.author.save()
+        for url in urls:
+            with self.subTest(url=url, change='auteur'):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 200)
+
+        etags = {url: self.revalidate(url) for url in urls}
+        with mock.patch('portfolio.conditional.deploy_version', return_value='deploy2'):
+            for url in urls:
+                with self.subTest(url=url, change='déploiement'):
+                    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 200)
+
+    def test_authenticated_pages_have_no_validators(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+@mock.patch.object(PostSitemap, 'limit', 2)
+class SitemapTests(TestCase):
+    """Index découpé en tranches d'ids, tranches en cache invalidées une à une"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('auteur')
+        cls.posts = [Post.objects.create(title=f'Article {i}', content='Contenu', author=author)
+                     for i in range(5)]
+
+    def setUp(self):
+        cache.clear()
+
+    def get_chunk(self, page):
+        response = self.client.get(reverse('sitemap_section', args=['posts']), {'p': page})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_index_lists_every_chunk(self):
+        content = self.client.get('/sitemap.xml').content.decode()
+        last = PostSitemap.chunk(self.posts[-1].pk)
+        self.assertIn('sitemap-static.xml', content)
+        self.assertIn(f'sitemap-posts.xml?p={last}', content)
+        self.assertNotIn(f'sitemap-posts.xml?p={last + 1}', content)
+
+    def test_chunks_exclude_unpublished_posts(self):
+        Post.objects.filter(pk=self.posts[0].pk).update(is_published=False)
+        content = self.get_chunk(1).decode()
+        self.assertNotIn(self.posts[0].get_absolute_url(), content)
+        self.assertIn(self.posts[1].get_absolute_url(), content)
+
+    def test_chunk_is_read_while_streaming(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('sitemap_section', args=['posts']), {'p': 1})
+            self.assertTrue(response.streaming)
+            before = len(ctx.captured_queries)
+            content = b''.join(response.streaming_content).decode()
+        self.assertGreater(len(ctx.captured_queries), before)
+        site = SimpleNamespace(domain='testserver', name='testserver')
+        expected = PostSitemap().get_urls(page=1, site=site, protocol='http')
+        self.assertEqual(content.count('<url>'), len(expected))
+        for url in expected:
+            self.assertIn(f"<loc>{url['location']}</loc><lastmod>{url['lastmod'].isoformat()}</lastmod>"
+                          f"<changefreq>monthly</changefreq><priority>0.8</priority>", content)
+        static = self.client.get(reverse('sitemap_section', args=['static']))
+        self.assertIn('<url><loc>http://testserver/</loc><changefreq>monthly</changefreq>'
+                      '<priority>0.6</priority></url>', b''.join(static.streaming_content).decode())
+
+    def test_only_changed_chunk_is_regenerated(self):
+        first, last = PostSitemap.chunk(self.posts[0].pk), PostSitemap.chunk(self.posts[-1].pk)
+        self.get_chunk(first)
+        self.get_chunk(last)
+        self.posts[-1].title = 'Modifié'
+        self.posts[-1].save()
+        # Une requête pour les validateurs HTTP, une pour le nombre de tranches
+        # (effacé à chaque modification) ; seule la tranche modifiée est relue
+        with self.assertNumQueries(2):
+            self.get_chunk(first)
+        with self.assertNumQueries(2):
+            self.get_chunk(last)
+        with self.assertNumQueries(1):
+            self.get_chunk(first)
+
+    def test_invalid_page_creates_no_generation(self):
+        last = PostSitemap.chunk(self.posts[-1].pk)
+        for page in [last + 1, 0, 'abc']:
+            with self.subTest(page=page):
+                response = self.client.get(reverse('sitemap_section', args=['posts']), {'p': page})
+                self.assertEqual(response.status_code, 404)
+                self.assertIsNone(cache.get(f'gen:sitemap:posts:{page}'))
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class SiteConfigCacheTests(TestCase):
+    """La configuration est relue seulement après une modification"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_solo_is_cached_until_saved(self):
+        config = SiteConfig.get_solo()
+        with self.assertNumQueries(0):
+            self.assertIs(SiteConfig.get_solo(), config)
+
+        editable = SiteConfig.get_solo(cached=False)
+        self.assertIsNot(editable, config)
+        with self.captureOnCommitCallbacks(execute=True):
+            editable.save()
+        with self.assertNumQueries(1):
+            reloaded = SiteConfig.get_solo()
+        self.assertEqual(reloaded.updated_at, editable.updated_at)
+
+
+class MediaServingTests(TestCase):
+    """Médias servis avec empreinte, cache longue durée et requêtes partielles"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.data = bytes(range(256)) * 40
+        self.name = default_storage.save('cv/mon cv.pdf', ContentFile(self.data))
+        self.url = default_storage.url(self.name)
+
+    def test_saved_names_are_content_hashed(self):
+        self.assertRegex(self.name, r'^cv/mon cv\.[0-9a-f]{12}\.pdf$')
+        again = default_storage.save(self.name, ContentFile(b'autre contenu'))
+        self.assertEqual(again.count('.'), 2)
+
+    def test_full_response_is_immutable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        self.assertIn('immutable', response['Cache-Control'])
+        revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_outside_media_root_is_not_found(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+    @override_settings(MEDIA_SERVE_BACKEND='nginx')
+    def test_nginx_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + quote(self.name))
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(CACHES=NO_CACHE, ROOT_URLCONF='portfolio_project.urls_async')
+class AsyncViewsTests(TestCase):
+    """Les vues async (déploiement ASGI) rendent les mêmes pages que les vues sync"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('auteur', password='x')
+        cls.post = Post.objects.create(title='Article async', content='Contenu', author=cls.author)
+        Comment.objects.create(post=cls.post, author=cls.author, content='Premier commentaire')
+
+    async def test_public_pages(self):
+        for url in [reverse('home'), reverse('blog'), reverse('blog') + '?page=1',
+                    reverse('blog') + '?search=async', reverse('post_detail', args=[self.post.pk])]:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Article async')
+
+    async def test_not_modified(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_authenticated_comment(self):
+        await self.async_client.aforce_login(self.author)
+        url = reverse('post_detail', args=[self.post.pk])
+        self.assertContains(await self.async_client.get(url), 'auteur')
+        response = await self.async_client.post(url, {'content': 'Commentaire async'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(await Comment.objects.filter(content='Commentaire async').acount(), 1)
+
+    async def test_download_cv_without_file(self):
+        response = await self.async_client.get(reverse('download_cv'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+
+@override_settings(CACHES=NO_CACHE)
+class BulkModerationTests(TestCase):
+    """Actions groupées : requêtes ensemblistes et compteurs exacts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True, is_superuser=True)
+        cls.posts = [Post.objects.create(title=f'Article {i}', content='Contenu', author=cls.admin)
+                     for i in range(3)]
+        for post in cls.posts:
+            for i in range(6):
+                Comment.objects.create(post=post, author=cls.admin, content='Spam', is_approved=i % 2 == 0)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertCountersExact(self):
+        stored = {post.pk: (post.approved_comment_count, post.pending_comment_count)
+                  for post in Post.objects.all()}
+        stats = SiteStats.get_solo()
+        self.assertEqual(counters.reconcile(), {
+            'total_posts': stats.total_posts, 'published_posts': stats.published_posts,
+            'total_comments': stats.total_comments, 'pending_comments': stats.pending_comments,
+        })
+        self.assertEqual(stored, {post.pk: (post.approved_comment_count, post.pending_comment_count)
+                                  for post in Post.objects.all()})
+
+    def bulk(self, **data):
+        return self.client.post(reverse('admin_comments_bulk'), data)
+
+    def test_missing_stats_row_is_rebuilt(self):
+        SiteStats.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.posts[0], author=self.admin, content='Après', is_approved=False)
+        self.assertEqual(SiteStats.objects.get().total_comments, 19)
+        self.assertCountersExact()
+
+        SiteStats.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].delete()
+        stats = SiteStats.objects.get()
+        self.assertEqual((stats.total_posts, stats.total_comments), (2, 13))
+        self.assertIsNotNone(stats.listing_changed_at)
+
+        SiteStats.objects.all().delete()
+        self.assertEqual(SiteStats.get_solo().total_posts, 2)
+
+    def test_selected_ids(self):
+        ids = list(Comment.objects.filter(is_approved=False).values_list('pk', flat=True)[:4])
+        self.bulk(action='approve', ids=ids)
+        self.assertEqual(Comment.objects.filter(pk__in=ids, is_approved=True).count(), 4)
+        self.assertCountersExact()
+
+    def test_all_matching_filter(self):
+        self.bulk(action='delete', select_all='1', status='pending')
+        self.assertFalse(Comment.objects.filter(is_approved=False).exists())
+        self.assertEqual(Comment.objects.count(), 9)
+        self.assertCountersExact()
+
+    def test_select_all_label_shows_total(self):
+        for query in ['?status=pending', '?status=pending&page=1']:
+            with self.subTest(query=query):
+                response = self.client.get(reverse('admin_comments') + query)
+                self.assertContains(response, 'Tous les commentaires en attente (9), pas seulement cette page')
+
+    def test_query_count_does_not_depend_on_selection_size(self):
+        def run(action):
+            with CaptureQueriesContext(connection) as ctx:
+                self.bulk(action=action, select_all='1')
+            return len(ctx.captured_queries)
+
+        unapprove, approve = run('unapprove'), run('approve')
+        self.assertEqual(unapprove, approve)
+        self.assertLess(unapprove, 15)
+        self.assertCountersExact()
+
+    def test_admin_actions(self):
+        changelist = reverse('admin:portfolio_comment_changelist')
+        ids = list(Comment.objects.values_list('pk', flat=True)[:5])
+        self.client.post(changelist, {'action': 'unapprove_comments', '_selected_action': ids})
+        self.assertFalse(Comment.objects.filter(pk__in=ids, is_approved=True).exists())
+        self.client.post(changelist, {'action': 'delete_selected', '_selected_action': ids, 'post': 'yes'})
+        self.assertFalse(Comment.objects.filter(pk__in=ids).exists())
+        self.assertCountersExact()
+
+
+@skipUnless(connection.vendor == 'sqlite', "plans EXPLAIN QUERY PLAN de SQLite")
+@override_settings(CACHES=NO_CACHE)
+class QueryPlanTests(TestCase):
+    """Les requêtes des pages principales passent par des index, jamais par un parcours de table"""
+
+    FULL_SCAN = re.compile(r'^SCAN (portfolio_\w+|auth_user)$')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True, is_superuser=True)
+        cls.post = Post.objects.create(title='Article', content='Contenu', author=cls.admin)
+        Comment.objects.create(post=cls.post, author=cls.admin, content='Commentaire')
+
+    def plans(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if query['sql'].startswith('SELECT'):
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    yield query['sql'], [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndexes(self, url):
+        for sql, plan in self.plans(url):
+            with self.subTest(url=url, sql=sql):
+                self.assertFalse([step for step in plan if self.FULL_SCAN.match(step)], plan)
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_public_pages(self):
+        cursor = reverse('blog') + '?cursor=' + encode_cursor('n', self.post)
+        for url in [reverse('home'), reverse('blog'), cursor, reverse('post_detail', args=[self.post.pk])]:
+            self.assertUsesIndexes(url)
+
+    def test_admin_dashboard(self):
+        self.client.force_login(self.admin)
+        self.assertUsesIndexes(reverse('admin_dashboard'))
+
+
+@override_settings(CACHES=NO_CACHE, METRICS_TOKEN='secret')
+class InstrumentationTests(TestCase):
+    """Mesures par vue : dashboard et export Prometheus"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True, is_superuser=True)
+        cls.post = Post.objects.create(title='Article', content='Contenu', author=cls.admin)
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def test_records_per_view(self):
+        for _ in range(2):
+            self.client.get(reverse('post_detail', args=[self.post.pk]))
+        row = {row['view']: row for row in instrumentation.summary()}['post_detail']
+        self.assertEqual(row['count'], 2)
+        self.assertGreater(row['queries'], 0)
+        self.assertGreater(row['template_ms'], 0)
+        self.assertGreater(row['size'], 0)
+        self.assertLessEqual(row['p50'], row['p99'])
+
+    def test_wrapper_only_during_request(self):
+        self.client.get(reverse('home'))
+        self.assertNotIn(instrumentation.record_sql, connection.execute_wrappers)
+
+        # Connexion ouverte dans un execute_wrapper déjà posé : il est bien retiré
+        def outer(execute, *args):
+            return execute(*args)
+
+        other = connections.create_connection('default')
+        try:
+            with other.execute_wrapper(outer):
+                other.ensure_connection()
+            self.assertEqual(other.execute_wrappers, [])
+        finally:
+            other.close()
+
+    def test_dashboard_panel(self):
+        self.client.get(reverse('home'))
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertContains(response, 'Performance')
+        self.assertContains(response, '<code>home</code>', html=True)
+
+    def test_prometheus_endpoint(self):
+        self.client.get(reverse('home'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), headers={'authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'portfolio_request_duration_seconds_count{view="home"} 1')
+        self.assertContains(response, 'portfolio_sql_queries_total{view="home"}')
+
+
+class BenchmarkDataTests(TestCase):
+    """Le jeu de données synthétique est reproductible et cohérent"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def seed(self):
+        return seed_benchmark_data(users=5, posts=20, comments=100, image_size=(64, 48), seed=7)
+
+    def test_reproducible(self):
+        totals = self.seed()
+        snapshot = list(Post.objects.order_by('pk').values_list('title', 'media_type', 'is_published'))
+        Comment.objects.all().delete()
+        Post.objects.all().delete()
+        self.assertEqual(self.seed(), totals)
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('title', 'media_type', 'is_published')),
+                         snapshot)
+
+    def test_counters_and_media(self):
+        totals = self.seed()
+        self.assertEqual(totals['total_comments'], 100)
+        self.assertEqual(SiteStats.get_solo().total_comments, 100)
+        self.assertEqual(sum(Post.objects.values_list('approved_comment_count', flat=True)),
+                         Comment.objects.filter(is_approved=True).count())
+        for post in Post.objects.filter(media_type='image'):
+            self.assertTrue(default_storage.exists(post.media.name))
+        self.assertTrue(Post.objects.filter(media_type='video', video_url__contains='youtu').exists())
+
+
+@override_settings(CACHES=NO_CACHE)
+class MediaIngestTests(TestCase):
+    """Compression à l'ingestion : chemins rapides, bombes et dédoublonnage"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('auteur')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def image(self, name, size, fmt, **options):
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 80, 40)).save(buffer, format=fmt, **options)
+        return ContentFile(buffer.getvalue(), name=name)
+
+    def test_small_images_are_not_reencoded(self):
+        for upload in [self.image('photo.jpg', (800, 600), 'JPEG', quality=70),
+                       self.image('schema.png', (800, 600), 'PNG')]:
+            with self.subTest(name=upload.name):
+                self.assertIs(Post().compress_image(upload), upload)
+
+    def test_large_images_are_downscaled(self):
+        for upload in [self.image('photo.jpg', (4000, 3000), 'JPEG'), self.image('schema.png', (2400, 1200), 'PNG')]:
+            with self.subTest(name=upload.name):
+                result = Post().compress_image(upload)
+                self.assertIsNot(result, upload)
+                self.assertEqual(max(Image.open(result).size), 1600)
+
+    def test_decompression_bomb_is_rejected(self):
+        upload = self.image('schema.png', (2000, 1000), 'PNG')
+        with mock.patch('portfolio.images.IMAGE_MAX_PIXELS', 1000):
+            with self.assertRaises(Image.DecompressionBombError):
+                Post().compress_image(upload)
+
+    def test_renditions_reject_decompression_bomb(self):
+        # Sous la taille maximale : pas de compression, seules les déclinaisons décodent l'image
+        post = Post.objects.create(title='Schéma', content='x', author=self.author,
+                                   media=self.image('schema.png', (800, 600), 'PNG'))
+        with mock.patch('portfolio.images.IMAGE_MAX_PIXELS', 1000):
+            tasks.run_pending()
+        job = MediaJob.objects.get(post=post)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('800x600', job.error)
+        post.refresh_from_db()
+        self.assertEqual(post.renditions, {})
+
+    def test_identical_uploads_share_the_stored_file(self):
+        data = self.image('photo.jpg', (2000, 1000), 'JPEG').read()
+        first = Post.objects.create(title='Un', content='x', author=self.author,
+                                    media=SimpleUploadedFile('photo.jpg', data))
+        second = Post.objects.create(title='Deux', content='x', author=self.author,
+                                     media=SimpleUploadedFile('copie.jpg', data))
+        self.assertEqual(second.media.name, first.media.name)
+        self.assertEqual(MediaJob.objects.count(), 1)
+
+        tasks.run_pending()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.media.name, first.media.name)
+        self.assertEqual(second.renditions, first.renditions)
+        self.assertTrue(default_storage.exists(first.media.name))
+        self.assertEqual(Image.open(default_storage.open(first.media.name)).size, (1600, 800))
+
+
+class StaticAssetsTests(TestCase):
+    """collectstatic : noms avec empreinte, variantes gzip, service selon Accept-Encoding"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, static_root)
+        settings_override = override_settings(STATIC_ROOT=static_root)
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.url = static('css/style.css')
+        with open(os.path.join(static_root, 'css', 'style.css'), 'rb') as f:
+            cls.original = f.read()
+
+    def test_hashed_url_with_gzip_variant(self):
+        self.assertRegex(self.url, r'^/static/css/style\.[0-9a-f]{12}\.css$')
+        response = self.client.get(self.url, headers={'accept-encoding': 'gzip, deflate, br;q=0'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.original)
+
+    def test_identity_and_not_modified(self):
+        response = self.client.get(self.url, headers={'accept-encoding': 'identity'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.original)
+        response = self.client.get(self.url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file_falls_through(self):
+        self.assertEqual(self.client.get('/static/css/absent.css').status_code, 404)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class FragmentCacheTests(TestCase):
+    """Cartes et commentaires servis depuis le cache tant que leur clé ne change pas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('lecteur')
+        cls.post = Post.objects.create(title='Titre initial', content='Contenu', author=cls.reader)
+        cls.comment = Comment.objects.create(post=cls.post, author=cls.reader, content='Premier avis')
+
+    def setUp(self):
+        cache.clear()
+        # Connecté : pas de cache de page, seul le cache de fragments intervient
+        self.client.force_login(self.reader)
+
+    def test_post_card_follows_updated_at(self):
+        self.assertContains(self.client.get(reverse('blog')), 'Titre initial')
+        Post.objects.filter(pk=self.post.pk).update(title='Titre modifié sans updated_at')
+        self.assertContains(self.client.get(reverse('blog')), 'Titre initial')
+        post = Post.objects.get(pk=self.post.pk)
+        post.title = 'Titre enregistré'
+        post.save()
+        self.assertContains(self.client.get(reverse('blog')), 'Titre enregistré')
+        self.assertContains(self.client.get(reverse('home')), 'Titre enregistré')
+
+    def test_single_cache_read_per_page(self):
+        self.client.get(reverse('post_detail', args=[self.post.pk]))
+        template = get_template('portfolio/includes/comment.html')
+        with mock.patch('portfolio.fragments.get_template', return_value=template), \
+                mock.patch.object(template, 'render', wraps=template.render) as render, \
+                mock.patch('portfolio.fragments.cache.get_many', wraps=cache.get_many) as get_many:
+            response = self.client.get(reverse('post_detail', args=[self.post.pk]))
+        self.assertContains(response, 'Premier avis')
+        fragment_reads = [call.args[0] for call in get_many.call_args_list if call.args[0][0].startswith('frag:')]
+        self.assertEqual(len(fragment_reads), 1)
+        self.assertEqual(render.call_count, 0)
+
+    def test_author_rename_invalidates(self):
+        self.assertContains(self.client.get(reverse('post_detail', args=[self.post.pk])), 'lecteur')
+        self.reader.first_name, self.reader.last_name = 'Ada', 'Lovelace'
+        self.reader.save()
+        self.assertContains(self.client.get(reverse('post_detail', args=[self.post.pk])), 'Ada Lovelace')
+
+    def test_edited_comment_invalidates(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        self.assertContains(self.client.get(url), 'Premier avis')
+        comment = Comment.objects.get(pk=self.comment.pk)
+        generation = caching.get_generations(['fragments'])
+        comment.save()
+        self.assertEqual(caching.get_generations(['fragments']), generation)
+        comment.content = 'Avis corrigé'
+        comment.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Avis corrigé')
+        self.assertNotContains(response, 'Premier avis')
+
+    def test_update_fields_content_rerenders(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.content = 'Nouveau <b>texte</b>\n\nSuite'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p>Nouveau &lt;b&gt;texte&lt;/b&gt;</p>\n\n<p>Suite</p>')
+        self.assertEqual(post.excerpt, 'Nouveau <b>texte</b> Suite')
+
+    def test_render_post_content_refreshes_cards(self):
+        self.assertContains(self.client.get(reverse('blog')), 'Contenu')
+        # Contenu modifié hors ORM : HTML et extrait stockés obsolètes
+        Post.objects.filter(pk=self.post.pk).update(content='Contenu réécrit')
+        out = StringIO()
+        call_command('render_post_content', stdout=out)
+        self.assertIn('1 article(s)', out.getvalue())
+        self.assertContains(self.client.get(reverse('blog')), 'Contenu réécrit')
+        call_command('render_post_content', stdout=out)
+        self.assertIn('0 article(s)', out.getvalue())
+
+
+@override_settings(CACHES=NO_CACHE)
+class VideoMetadataTests(TestCase):
+    """Identifiant, URL d'intégration et miniature calculés à l'enregistrement"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('auteur')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        buffer = BytesIO()
+        Image.new('RGB', (480, 360), (20, 20, 20)).save(buffer, format='JPEG')
+        fetch = mock.patch('portfolio.tasks.videos.fetch_thumbnail',
+                           side_effect=lambda video_id: ContentFile(buffer.getvalue(), name=f'{video_id}.jpg'))
+        self.fetch = fetch.start()
+        self.addCleanup(fetch.stop)
+
+    def test_parse_video_id(self):
+        cases = {
+            'https://www.youtube.com/watch?v=oYUszFIXdfg': 'oYUszFIXdfg',
+            'https://youtube.com/watch?feature=share&v=oYUszFIXdfg&t=42': 'oYUszFIXdfg',
+            'https://m.youtube.com/watch?v=oYUszFIXdfg': 'oYUszFIXdfg',
+            'https://youtu.be/oYUszFIXdfg?si=abc': 'oYUszFIXdfg',
+            'https://www.youtube.com/shorts/oYUszFIXdfg': 'oYUszFIXdfg',
+            'https://www.youtube.com/embed/oYUszFIXdfg?start=3': 'oYUszFIXdfg',
+            'https://www.youtube-nocookie.com/embed/oYUszFIXdfg': 'oYUszFIXdfg',
+            'https://www.youtube.com/live/oYUszFIXdfg': 'oYUszFIXdfg',
+            'https://www.youtube.com/watch?v=trop-court': '',
+            'https://vimeo.com/123456': '',
+            'https://evil.example/watch?v=oYUszFIXdfg': '',
+            None: '',
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(videos.parse_video_id(url), expected)
+
+    def test_save_stores_metadata_and_queues_thumbnail(self):
+        post = Post.objects.create(title='Vidéo', content='x', author=self.author,
+                                   video_url='https://www.youtube.com/shorts/oYUszFIXdfg')
+        self.assertEqual(post.video_id, 'oYUszFIXdfg')
+        self.assertEqual(post.video_embed_url, 'https://www.youtube.com/embed/oYUszFIXdfg')
+        self.assertEqual(post.video_thumbnail_url, 'https://i.ytimg.com/vi/oYUszFIXdfg/hqdefault.jpg')
+        self.assertEqual(list(MediaJob.objects.values_list('kind', 'source_name')),
+                         [('video_thumbnail', 'oYUszFIXdfg')])
+
+        tasks.run_pending()
+        post.refresh_from_db()
+        self.assertTrue(default_storage.exists(post.video_thumbnail.name))
+        self.assertEqual(post.video_thumbnail_url, post.video_thumbnail.url)
+
+        # Même vidéo dans un autre article : miniature reprise sans téléchargement
+        twin = Post.objects.create(title='Reprise', content='x', author=self.author,
+                                   video_url='https://youtu.be/oYUszFIXdfg')
+        self.assertEqual(twin.video_thumbnail.name, post.video_thumbnail.name)
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(MediaJob.objects.count(), 1)
+
+        post.video_url = 'https://example.com/video'
+        post.save(update_fields=['video_url'])
+        post.refresh_from_db()
+        self.assertEqual((post.video_id, post.video_embed_url, post.video_thumbnail.name), ('', '', ''))
+
+    def test_listing_renders_facade_without_parsing(self):
+        Post.objects.create(title='Vidéo', content='x', author=self.author,
+                            video_url='https://m.youtube.com/watch?v=oYUszFIXdfg')
+        with mock.patch('portfolio.videos.parse_video_id') as parse:
+            response = self.client.get(reverse('blog'))
+        parse.assert_not_called()
+        self.assertContains(response, 'data-embed-url="https://www.youtube.com/embed/oYUszFIXdfg"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertNotContains(response, '<iframe')
+
+    def test_backfill_command(self):
+        post = Post.objects.create(title='Ancienne', content='x', author=self.author)
+        Post.objects.filter(pk=post.pk).update(video_url='https://www.youtube.com/embed/oYUszFIXdfg')
+        call_command('backfill_video_metadata', '--fetch', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.video_embed_url, 'https://www.youtube.com/embed/oYUszFIXdfg')
+        self.assertTrue(default_storage.exists(post.video_thumbnail.name))
+        self.assertFalse(MediaJob.objects.exists())
+
+
+class RateLimitTests(TestCase):
+    """Seau à jetons par route et par utilisateur ou adresse IP"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('lecteur', password='secret-123')
+        cls.other = User.objects.create_user('autre')
+        cls.post = Post.objects.create(title='Titre', content='Contenu', author=cls.reader)
+
+    def setUp(self):
+        cache.clear()
+        ratelimit.reset()
+        self.addCleanup(ratelimit.reset)
+
+    def test_login_is_throttled_before_authentication(self):
+        login_url, credentials = reverse('login'), {'username': 'lecteur', 'password': 'faux'}
+        # DummyCache : l'état est gardé en mémoire du processus
+        with override_settings(CACHES=NO_CACHE), \
+                mock.patch('django.contrib.auth.forms.authenticate', return_value=None) as authenticate:
+            statuses = [self.client.post(login_url, credentials).status_code for _ in range(6)]
+            self.assertEqual(statuses, [200] * 5 + [429])
+            self.assertEqual(authenticate.call_count, 5)
+            # Autre adresse, autre seau ; les GET ne sont pas limités
+            self.assertEqual(self.client.post(login_url, credentials, REMOTE_ADDR='10.0.0.2').status_code, 200)
+            self.assertEqual(self.client.get(login_url).status_code, 200)
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_comments_are_throttled_per_user(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        self.client.force_login(self.reader)
+        statuses = [self.client.post(url, {'content': f'Avis {i}'}).status_code for i in range(4)]
+        self.assertEqual(statuses, [302, 302, 302, 429])
+        self.assertEqual(Comment.objects.count(), 3)
+
+        with mock.patch('portfolio.ratelimit.time.time', return_value=time.time() + 10):
+            self.assertEqual(self.client.post(url, {'content': 'Plus tard'}).status_code, 302)
+
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.post(url, {'content': 'Autre lecteur'}).status_code, 302)
+
+    def test_retry_after(self):
+        limit = ratelimit.Limit('2/m', burst=1)
+        with override_settings(CACHES=LOCAL_CACHE):
+            self.assertEqual(ratelimit.consume('rl:test', limit), 0)
+            self.assertAlmostEqual(ratelimit.consume('rl:test', limit), 30, delta=1)
+        response = ratelimit.too_many_requests(29.2)
+        self.assertEqual((response.status_code, response['Retry-After']), (429, '30'))
+        with self.assertRaises(ValueError):
+            ratelimit.Limit('10 par minute')
+
+
+@override_settings(CACHES=LOCAL_CACHE, RATE_LIMIT_ENABLED=False)
+class SessionProfileTests(TestCase):
+    """Profil par défaut : sessions lues depuis le cache, messages en cookie signé"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user('lecteur')
+        cls.post = Post.objects.create(title='Titre', content='Contenu', author=cls.reader)
+
+    def session_queries(self, method, *args):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(*args)
+        return response, sum('django_session' in query['sql'] for query in ctx.captured_queries)
+
+    def test_comment_flow_without_session_queries(self):
+        self.client.force_login(self.reader)
+        url = reverse('post_detail', args=[self.post.pk])
+        response, queries = self.session_queries('post', url, {'content': 'Bel article'})
+        self.assertEqual((response.status_code, queries), (302, 0))
+        self.assertIn('messages', response.cookies)
+        response, queries = self.session_queries('get', url)
+        self.assertContains(response, 'Votre commentaire a été ajouté')
+        self.assertEqual(queries, 0)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_purge_sessions(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'expiree{i}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='valide', session_data='', expire_date=now + timedelta(days=1))
+        out = StringIO()
+        call_command('purge_sessions', '--batch-size', '2', stdout=out)
+        self.assertIn('5 session(s)', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['valide'])
+
+
+@skipUnless(connection.vendor == 'sqlite', "PRAGMA propres à SQLite")
+class SqliteTuningTests(TestCase):
+    """PRAGMA par connexion ; le mode WAL n'est posé que par la migration"""
+
+    def file_connection(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        wrapper = connections.create_connection('default')
+        wrapper.settings_dict = {**wrapper.settings_dict, 'NAME': os.path.join(directory, 'base.sqlite3')}
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas_leave_journal_mode_alone(self):
+        wrapper = self.file_connection()
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), settings.SQLITE_PRAGMAS['cache_size'])
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+    def test_migration_enables_wal(self):
+        migration = import_module('portfolio.migrations.0016_sqlite_wal')
+        wrapper = self.file_connection()
+        migration.set_journal_mode(None, SimpleNamespace(connection=wrapper))
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PageCacheTests(TestCase):
+    """Pages anonymes en cache, invalidées par génération à chaque écriture"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('auteur')
+        cls.post = Post.objects.create(title='Titre initial', content='Contenu', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def rename(self, title):
+        # Sans signal : le fragment de carte change (updated_at), pas la génération des pages
+        Post.objects.filter(pk=self.post.pk).update(title=title, updated_at=timezone.now())
+
+    def test_anonymous_page_served_from_cache_until_save(self):
+        self.assertContains(self.client.get(reverse('blog')), 'Titre initial')
+        self.rename('Titre sans signal')
+        self.assertContains(self.client.get(reverse('blog')), 'Titre initial')
+        post = Post.objects.get(pk=self.post.pk)
+        post.title = 'Titre enregistré'
+        post.save()
+        self.assertContains(self.client.get(reverse('blog')), 'Titre enregistré')
+
+    def test_authenticated_pages_bypass_cache(self):
+        self.client.get(reverse('blog'))
+        self.rename('Titre sans signal')
+        self.client.force_login(self.author)
+        self.assertContains(self.client.get(reverse('blog')), 'Titre sans signal')
+
+    def test_generations_expire(self):
+        with mock.patch.object(caching.cache, 'set_many', wraps=caching.cache.set_many) as set_many, \
+                mock.patch.object(caching.cache, 'touch', wraps=caching.cache.touch) as touch:
+            self.assertEqual(self.client.get(reverse('post_detail', args=[self.post.pk + 1000])).status_code, 404)
+            caching.invalidate(f'post:{self.post.pk + 1000}')
+        seeded = {key: call.args[1] for call in set_many.call_args_list for key in call.args[0]}
+        self.assertEqual(seeded[f'gen:post:{self.post.pk + 1000}'], caching.GENERATION_TIMEOUT)
+        touch.assert_called_once_with(f'gen:post:{self.post.pk + 1000}', caching.GENERATION_TIMEOUT)
+        self.assertGreater(caching.GENERATION_TIMEOUT, caching.PAGE_CACHE_TIMEOUT)
+
+    def test_comment_and_delete_bump_generations(self):
+        url = reverse('post_detail', args=[self.post.pk])
+        self.client.get(url)
+        self.rename('Titre sans signal')
+        Comment.objects.create(post=self.post, author=self.author, content='Avis')
+        self.assertContains(self.client.get(url), 'Titre sans signal')
+
+        other = Post.objects.create(title='Autre article', content='x', author=self.author)
+        self.assertContains(self.client.get(reverse('home')), 'Autre article')
+        other.delete()
+        self.assertNotContains(self.client.get(reverse('home')), 'Autre article')
+
+    def test_only_plain_200_responses_are_stored(self):
+        calls = []
+
+        @caching.cache_public_page('listing')
+        def view(request, status=200, cookie=False):
+            calls.append(status)
+            response = HttpResponse(status=status)
+            if cookie:
+                response.set_cookie('suivi', '1')
+            return response
+
+        request = RequestFactory().get('/page/')
+        request.user = AnonymousUser()
+        request._messages = message_storage(request)
+        for kwargs in [{}, {'status': 404}, {'cookie': True}]:
+            calls.clear()
+            view(request, **kwargs)
+            view(request, **kwargs)
+            with self.subTest(**kwargs):
+                self.assertEqual(len(calls), 1 if not kwargs else 2)
+            cache.clear()
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class PaginationTests(TestCase):
+    """Pagination par curseur (created_at, id) et pagination numérotée"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('auteur')
+        now = timezone.now()
+        # Trois dates pour sept articles : les égalités sont départagées par l'id
+        Post.objects.bulk_create([
+            Post(title=f'Article {i}', content='x', author=author, created_at=now - timedelta(hours=i // 3))
+            for i in range(7)
+        ])
+        cls.expected = list(Post.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, token, direction):
+        pages = []
+        while True:
+            page = cursor_paginate(Post.objects.all(), token, 2)
+            pages.append([post.pk for post in page])
+            token = page.next_cursor if direction == 'next' else page.previous_cursor
+            if token is None:
+                return pages, page
+
+    def test_forward_and_backward_across_ties(self):
+        forward, last = self.walk(None, 'next')
+        self.assertEqual([pk for page in forward for pk in page], self.expected)
+        self.assertEqual([len(page) for page in forward], [2, 2, 2, 1])
+        backward, first = self.walk(last.previous_cursor, 'previous')
+        self.assertEqual(backward, forward[-2::-1])
+        self.assertFalse(first.has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        for token in ['nimporte-quoi', encode_cursor('n', Post.objects.first())[:-3] + '!!!', 'eHx5fHo']:
+            with self.subTest(token=token):
+                page = cursor_paginate(Post.objects.all(), token, 2)
+                self.assertEqual([post.pk for post in page], self.expected[:2])
+                self.assertFalse(page.has_previous())
+
+    def test_numbered_page_with_cached_count(self):
+        request = RequestFactory().get('/blog/', {'page': 2})
+        page = paginate(request, Post.objects.all(), 3, with_count=True)
+        self.assertEqual([post.pk for post in page], self.expected[3:6])
+        self.assertEqual((page.number, page.paginator.count, page.paginator.num_pages), (2, 7, 3))
+        Post.objects.filter(pk=self.expected[0]).delete()
+        # Total mis en cache quelques secondes : pas de COUNT(*) à chaque page
+        with self.assertNumQueries(1):
+            page = paginate(request, Post.objects.all(), 3, with_count=True)
+        self.assertEqual(page.paginator.count, 7)
+
+
+@skipUnless(connection.vendor == 'sqlite', "index FTS5 de SQLite")
+@override_settings(CACHES=NO_CACHE)
+class SearchIndexTests(TestCase):
+    """Index plein texte tenu à jour par les signaux de Post"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('auteur')
+
+    def setUp(self):
+        self.assertEqual(search.backend(), 'sqlite')
+
+    def fts_rows(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {search.FTS_TABLE} WHERE rowid = %s", [pk])
+            return cursor.fetchone()[0]
+
+    def test_index_follows_save_unpublish_and_delete(self):
+        post = Post.objects.create(title='Ornithorynque', content='Mammifère à bec', author=self.author)
+        self.assertEqual(search.ranked_ids(['ornitho']), [post.pk])
+
+        post.title = 'Échidné'
+        post.save()
+        self.assertEqual(search.ranked_ids(['ornithorynque']), [])
+        self.assertEqual(search.ranked_ids(['échidné']), [post.pk])
+
+        post.is_published = False
+        post.save(update_fields=['is_published'])
+        self.assertEqual(search.ranked_ids(['échidné']), [])
+
+        pk = post.pk
+        post.delete()
+        self.assertEqual(self.fts_rows(pk), 0)
+
+    def test_fts_syntax_is_neutralised(self):
+        post = Post.objects.create(title='Django et Python', content='Guide', author=self.author)
+        self.assertEqual(search._fts_query(['near', 'django']), '"near"* "django"*')
+        # Guillemets, NEAR(...) et opérateurs deviennent de simples termes cités
+        cases = {'"django': [post.pk], 'python" OR "django': [], 'NEAR(django python)': [], 'django*)': [post.pk]}
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(search.ranked_ids(search.get_terms(query)), expected)
+        self.assertEqual(self.client.get(reverse('blog'), {'search': 'NEAR("django'}).status_code, 200)
+
+    def test_every_result_page_is_reachable(self):
+        pks = [Post.objects.create(title=f'Kiwi {i}', content='Oiseau', author=self.author).pk for i in range(7)]
+        request = RequestFactory().get('/')
+        for engine in ['sqlite', None]:
+            with self.subTest(engine=engine), mock.patch('portfolio.search.backend', return_value=engine):
+                ranked = search.ranked_ids(['kiwi'])
+                self.assertCountEqual(ranked, pks)
+                pages = []
+                for number in (1, 2, 3):
+                    request.GET = {'page': str(number)}
+                    page = search.search_page(request, 'kiwi', 3)
+                    self.assertEqual((page.paginator.count, page.paginator.num_pages), (7, 3))
+                    pages.extend(post.pk for post in page.object_list)
+                self.assertEqual(pages, ranked)
+
+
+@override_settings(CACHES=NO_CACHE)
+class MediaJobQueueTests(TestCase):
+    """File de jobs en base : réservation conditionnelle, échecs et reprises"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('auteur')
+        # Média déjà enregistré (chaîne) : pas de job créé par save(), fichier absent
+        cls.post = Post.objects.create(title='Image', content='x', author=author, media='posts_media/absente.jpg')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def add_job(self, **fields):
+        return MediaJob.objects.create(post=self.post, source_name=self.post.media.name, **fields)
+
+    def test_claim_oldest_pending_once(self):
+        now = timezone.now()
+        taken = self.add_job(status='running', created_at=now - timedelta(minutes=3))
+        older = self.add_job(created_at=now - timedelta(minutes=2))
+        newer = self.add_job(created_at=now - timedelta(minutes=1))
+
+        self.assertEqual(tasks.claim_next_job(), older)
+        self.assertEqual(tasks.claim_next_job(), newer)
+        self.assertIsNone(tasks.claim_next_job())
+        self.assertEqual(set(MediaJob.objects.values_list('status', flat=True)), {'running'})
+        taken.refresh_from_db()
+        self.assertIsNone(taken.started_at)
+
+    def test_failure_retry_and_stale_requeue(self):
+        job = self.add_job()
+        for attempt in range(1, tasks.MAX_ATTEMPTS + 1):
+            self.assertEqual(tasks.run_pending(), 1)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('failed', attempt))
+            self.assertTrue(job.error)
+            # Plus de reprise une fois MAX_ATTEMPTS atteint
+            self.assertEqual(tasks.retry_failed_jobs(), 0 if attempt == tasks.MAX_ATTEMPTS else 1)
+
+        stale = self.add_job(status='running', started_at=timezone.now() - tasks.STALE_AFTER * 2)
+        fresh = self.add_job(status='running', started_at=timezone.now())
+        self.assertEqual(tasks.requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, fresh.status), ('pending', 'running'))
 
-# Create your tests here.
@@ -1,6 +1,13 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import ratelimit, views
+
+# Limites de débit par nom d'URL, par utilisateur ou adresse IP (voir ratelimit.py)
+RATE_LIMITS = {
+    'post_detail': ratelimit.Limit('6/m', burst=3),  # commentaires
+    'register': ratelimit.Limit('5/h'),
+    'login': ratelimit.Limit('10/m', burst=5),  # hachage du mot de passe
+}
 
 urlpatterns = [
     # Pages publiques
@@ -26,6 +33,9 @@ urlpatterns = [
     
     # Gestion des commentaires
     path('admin-dashboard/comments/', views.admin_comments, name='admin_comments'),
+    path('admin-dashboard/comments/bulk/', views.admin_comments_bulk, name='admin_comments_bulk'),
     path('admin-dashboard/comments/<int:pk>/toggle/', views.admin_comment_toggle, name='admin_comment_toggle'),
     path('admin-dashboard/comments/<int:pk>/delete/', views.admin_comment_delete, name='admin_comment_delete'),
-]
\ No newline at end of file
+]
+
+ratelimit.apply(urlpatterns, RATE_LIMITS)
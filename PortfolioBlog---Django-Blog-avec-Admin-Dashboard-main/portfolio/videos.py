@@ -0,0 +1,62 @@
+"""Vidéos YouTube des articles : identifiant, URL d'intégration et miniature.
+
+Calculés une fois dans `Post.save` (ou par `manage.py backfill_video_metadata`)
+et stockés sur l'article ; les templates n'analysent plus `video_url`.
+La miniature est téléchargée en arrière-plan (job `MediaJob` de type
+'video_thumbnail') puis servie depuis MEDIA_ROOT.
+"""
+import re
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+from urllib.request import Request, urlopen
+
+from PIL import Image
+
+from django.core.files.base import ContentFile
+
+VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+YOUTUBE_HOSTS = {'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com',
+                 'youtube-nocookie.com', 'www.youtube-nocookie.com'}
+# Chemins de la forme /<préfixe>/<id>
+PATH_PREFIXES = {'embed', 'shorts', 'live', 'v'}
+THUMBNAIL_DIR = 'posts_media/video_thumbnails/'
+THUMBNAIL_TIMEOUT = 10
+THUMBNAIL_MAX_BYTES = 2 * 1024 * 1024
+
+
+def parse_video_id(url):
+    """Identifiant YouTube de `url`, ou '' si l'URL n'est pas reconnue"""
+    if not url:
+        return ''
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    parts = [part for part in parsed.path.split('/') if part]
+    video_id = ''
+    if host == 'youtu.be':
+        video_id = parts[0] if parts else ''
+    elif host in YOUTUBE_HOSTS:
+        if parts == ['watch']:
+            video_id = parse_qs(parsed.query).get('v', [''])[0]
+        elif len(parts) >= 2 and parts[0] in PATH_PREFIXES:
+            video_id = parts[1]
+    return video_id if VIDEO_ID_RE.match(video_id) else ''
+
+
+def embed_url(video_id):
+    return f'https://www.youtube.com/embed/{video_id}' if video_id else ''
+
+
+def remote_thumbnail_url(video_id):
+    return f'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg' if video_id else ''
+
+
+def fetch_thumbnail(video_id):
+    """Télécharge la miniature ; ContentFile JPEG prêt à stocker"""
+    request = Request(remote_thumbnail_url(video_id), headers={'User-Agent': 'portfolio-thumbnails'})
+    with urlopen(request, timeout=THUMBNAIL_TIMEOUT) as response:
+        data = response.read(THUMBNAIL_MAX_BYTES + 1)
+    if len(data) > THUMBNAIL_MAX_BYTES:
+        raise ValueError(f"Miniature trop volumineuse pour {video_id}")
+    # Refuse tout ce qui n'est pas une image lisible
+    Image.open(BytesIO(data)).verify()
+    return ContentFile(data, name=f'{video_id}.jpg')
@@ -1,39 +1,33 @@
+import os
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
-from urllib.parse import urlparse, parse_qs
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 
-from .models import Post, Comment, SiteConfig
+from .models import Post, Comment, SiteConfig, SiteStats
 from .forms import CustomUserCreationForm, PostForm, CommentForm, SiteConfigForm
+from . import instrumentation, mediafiles, moderation, search
+from .caching import cache_public_page, cache_stats
+from .conditional import conditional_page, listing_validators, post_validators
+from .pagination import paginate
 
 
-def get_embed_url(video_url):
-    """Transforme une URL YouTube en URL embed valide"""
-    if not video_url:
-        return None
-    parsed_url = urlparse(video_url)
-    if parsed_url.hostname in ['www.youtube.com', 'youtube.com']:
-        query = parse_qs(parsed_url.query)
-        video_id = query.get('v')
-        if video_id:
-            return f"https://www.youtube.com/embed/{video_id[0]}"
-    elif parsed_url.hostname == 'youtu.be':
-        video_id = parsed_url.path[1:]
-        return f"https://www.youtube.com/embed/{video_id}"
-    return None
+# Les listes n'affichent que l'extrait précalculé : le corps n'est pas chargé
+LISTING_DEFERRED = ('content', 'content_html')
 
 
+@conditional_page(listing_validators)
+@cache_public_page('listing')
 def home(request):
     """Page d'accueil avec les derniers posts"""
-    recent_posts = Post.objects.filter(is_published=True)[:3]
-
-    # Préparer l'URL embed pour les vidéos YouTube
-    for post in recent_posts:
-        post.video_embed_url = get_embed_url(post.video_url)
+    recent_posts = (
+        Post.objects.filter(is_published=True)
+        .order_by('-created_at', '-id').defer(*LISTING_DEFERRED)[:3]
+    )
 
     context = {
         'recent_posts': recent_posts,
@@ -42,24 +36,19 @@ def home(request):
     return render(request, 'portfolio/home.html', context)
 
 
+@conditional_page(listing_validators)
+@cache_public_page('listing')
 def blog(request):
     """Page blog avec tous les posts"""
     search_query = request.GET.get('search', '')
-    posts = Post.objects.filter(is_published=True)
 
+    # Seule la page courante est chargée
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) |
-            Q(content__icontains=search_query)
-        )
-
-    # Préparer l'URL embed pour les vidéos YouTube
-    for post in posts:
-        post.video_embed_url = get_embed_url(post.video_url)
-
-    paginator = Paginator(posts, 6)  # 6 posts par page
-    page_number = request.GET.get('page')
-    posts = paginator.get_page(page_number)
+        # Résultats classés par pertinence (index plein texte), pagination numérotée
+        posts = search.search_page(request, search_query, 6)
+    else:
+        posts = Post.objects.filter(is_published=True).select_related('author').defer(*LISTING_DEFERRED)
+        posts = paginate(request, posts, 6, with_count=True)  # 6 posts par page
 
     context = {
         'posts': posts,
@@ -69,13 +58,12 @@ def blog(request):
     return render(request, 'portfolio/blog.html', context)
 
 
+@conditional_page(post_validators)
+@cache_public_page('post:{pk}')
 def post_detail(request, pk):
     """Détail d'un post avec commentaires"""
-    post = get_object_or_404(Post, pk=pk, is_published=True)
-    comments = post.comments.filter(is_approved=True)
-
-    # Préparer l'URL embed pour les vidéos YouTube
-    post.video_embed_url = get_embed_url(post.video_url)
+    post = get_object_or_404(Post.objects.select_related('author'), pk=pk, is_published=True)
+    comments = post.comments.filter(is_approved=True).select_related('author')
 
     if request.method == 'POST' and request.user.is_authenticated:
         form = CommentForm(request.POST)
@@ -120,20 +108,18 @@ def register(request):
 @staff_member_required
 def admin_dashboard(request):
     """Dashboard administrateur"""
-    posts = Post.objects.all()[:5]
-    recent_comments = Comment.objects.all()[:5]
-
-    stats = {
-        'total_posts': Post.objects.count(),
-        'published_posts': Post.objects.filter(is_published=True).count(),
-        'total_comments': Comment.objects.count(),
-        'pending_comments': Comment.objects.filter(is_approved=False).count(),
-    }
+    posts = Post.objects.order_by('-created_at', '-id').defer(*LISTING_DEFERRED)[:5]
+    recent_comments = Comment.objects.select_related('author', 'post').order_by('-created_at', '-id')[:5]
+
+    # Compteurs maintenus à chaque écriture (voir counters.py) : une seule lecture
+    stats = SiteStats.get_solo()
 
     context = {
         'posts': posts,
         'recent_comments': recent_comments,
         'stats': stats,
+        'cache_stats': cache_stats(),
+        'performance': instrumentation.summary(),
         'page_title': 'Dashboard Admin'
     }
     return render(request, 'portfolio/admin/dashboard.html', context)
@@ -142,7 +128,7 @@ def admin_dashboard(request):
 @staff_member_required
 def admin_cv_settings(request):
     """Gérer le CV (upload/remplacement)"""
-    config = SiteConfig.get_solo()
+    config = SiteConfig.get_solo(cached=False)
     if request.method == 'POST':
         form = SiteConfigForm(request.POST, request.FILES, instance=config)
         if form.is_valid():
@@ -161,10 +147,12 @@ def admin_cv_settings(request):
 
 
 def download_cv(request):
-    """Redirige vers l'URL du CV ou informe si indisponible"""
+    """Envoie le CV (Range et validateurs HTTP du fichier) ou informe si indisponible"""
     config = SiteConfig.get_solo()
     if config.cv:
-        return redirect(config.cv.url)
+        # URL stable : toujours revalider, contrairement aux médias à empreinte
+        filename = 'CV' + os.path.splitext(config.cv.name)[1]
+        return mediafiles.serve_file(request, config.cv.name, max_age=0, filename=filename)
     messages.warning(request, 'Le CV n\'est pas encore disponible.')
     return redirect('home')
 
@@ -172,10 +160,7 @@ def download_cv(request):
 @staff_member_required
 def admin_posts(request):
     """Liste des posts pour l'admin"""
-    posts = Post.objects.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    posts = paginator.get_page(page_number)
+    posts = paginate(request, Post.objects.defer(*LISTING_DEFERRED), 10, with_count=True)
 
     context = {
         'posts': posts,
@@ -194,6 +179,8 @@ def admin_post_create(request):
             post.author = request.user
             post.save()
             messages.success(request, 'Article créé avec succès!')
+            if post.media_jobs.exists():
+                messages.info(request, "L'image sera optimisée en arrière-plan.")
             return redirect('admin_posts')
     else:
         form = PostForm()
@@ -223,6 +210,7 @@ def admin_post_edit(request, pk):
     context = {
         'form': form,
         'post': post,
+        'media_job': post.media_jobs.first(),
         'page_title': 'Modifier l\'Article'
     }
     return render(request, 'portfolio/admin/post_form.html', context)
@@ -245,27 +233,75 @@ def admin_post_delete(request, pk):
     return render(request, 'portfolio/admin/post_confirm_delete.html', context)
 
 
+# Filtres de la page de modération (?status=...)
+COMMENT_STATUS_FILTERS = {
+    'pending': {'is_approved': False},
+    'approved': {'is_approved': True},
+}
+
+
+def filter_comments(status):
+    return Comment.objects.filter(**COMMENT_STATUS_FILTERS.get(status, {}))
+
+
 @staff_member_required
 def admin_comments(request):
     """Gestion des commentaires"""
-    comments = Comment.objects.all()
-    paginator = Paginator(comments, 20)
-    page_number = request.GET.get('page')
-    comments = paginator.get_page(page_number)
+    status = request.GET.get('status', '')
+    comments = filter_comments(status).select_related('author', 'post')
+    comments = paginate(request, comments, 20, descending=False, with_count=True)
+    # Page numérotée (?page=N) : le total est porté par le Paginator
+    total = comments.paginator.count if hasattr(comments, 'paginator') else comments.count
 
     context = {
         'comments': comments,
+        'total': total,
+        'status': status if status in COMMENT_STATUS_FILTERS else '',
+        'query': f'status={status}&' if status in COMMENT_STATUS_FILTERS else '',
         'page_title': 'Gestion des Commentaires'
     }
     return render(request, 'portfolio/admin/comments.html', context)
 
 
+@staff_member_required
+@require_POST
+def admin_comments_bulk(request):
+    """Approuver/désapprouver/supprimer plusieurs commentaires en une requête"""
+    action = request.POST.get('action')
+    status = request.POST.get('status', '')
+    back = redirect(f"{reverse('admin_comments')}?status={status}" if status in COMMENT_STATUS_FILTERS
+                    else 'admin_comments')
+
+    if request.POST.get('select_all') == '1':
+        # Tous les commentaires correspondant au filtre, pas seulement la page affichée
+        comments = filter_comments(status)
+    else:
+        ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+        if not ids:
+            messages.warning(request, 'Aucun commentaire sélectionné.')
+            return back
+        comments = Comment.objects.filter(pk__in=ids)
+
+    if action == 'approve':
+        count = moderation.set_approval(comments, True)
+        messages.success(request, f'{count} commentaire(s) approuvé(s).')
+    elif action == 'unapprove':
+        count = moderation.set_approval(comments, False)
+        messages.success(request, f'{count} commentaire(s) désapprouvé(s).')
+    elif action == 'delete':
+        count = moderation.delete_comments(comments)
+        messages.success(request, f'{count} commentaire(s) supprimé(s).')
+    else:
+        messages.error(request, 'Action inconnue.')
+    return back
+
+
 @staff_member_required
 def admin_comment_toggle(request, pk):
     """Approuver/désapprouver un commentaire"""
     comment = get_object_or_404(Comment, pk=pk)
     comment.is_approved = not comment.is_approved
-    comment.save()
+    comment.save(update_fields=['is_approved'])
 
     status = "approuvé" if comment.is_approved else "désapprouvé"
     messages.success(request, f'Commentaire {status} avec succès!')
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -32,7 +33,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'portfolio.instrumentation.PerformanceMiddleware',  # en premier : mesure toute la requête
     'django.middleware.security.SecurityMiddleware',
+    'portfolio.assets.StaticAssetsMiddleware',  # statiques avant session/auth (voir portfolio/assets.py)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -42,10 +45,13 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'portfolio_project.urls'
+if os.environ.get('DJANGO_ASYNC_VIEWS') == '1':
+    # Déploiement ASGI (asgi.py) : pages publiques en vues async
+    ROOT_URLCONF = 'portfolio_project.urls_async'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'portfolio.instrumentation.InstrumentedTemplates',  # DjangoTemplates + temps de rendu
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -54,6 +60,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'portfolio.context_processors.site_config',
             ],
         },
     },
@@ -63,26 +70,137 @@ WSGI_APPLICATION = 'portfolio_project.wsgi.application'
 
 
 # Database
-# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.mysql',
-#         'NAME': 'othmanechaikhi$portfolio_db',  # fournie par PythonAnywhere
-#         'USER': 'othmanechaikhi',               # fourni aussi
-#         'PASSWORD': 'Test@12345678',
-#         'HOST': 'othmanechaikhi.mysql.pythonanywhere-services.com',
-#         'PORT': '3306',
-#         'OPTIONS': {
-#             'sql_mode': 'traditional',
-#         }
-#     }
-# }
-DATABASES = {
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Profil choisi par DJANGO_DB_ENGINE : 'sqlite' (défaut), 'mysql' ou 'postgresql'.
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+# Connexions persistantes (secondes) : pas de reconnexion à chaque requête
+DB_CONN_MAX_AGE = int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 60))
+
+if DB_ENGINE == 'mysql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'othmanechaikhi$portfolio_db'),  # fournie par PythonAnywhere
+            'USER': os.environ.get('DJANGO_DB_USER', 'othmanechaikhi'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'othmanechaikhi.mysql.pythonanywhere-services.com'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '3306'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            # Vérifie une connexion réutilisée avant la requête (MySQL coupe les connexions inactives)
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'sql_mode': 'traditional',
+                'charset': 'utf8mb4',
+            }
+        }
+    }
+elif DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'portfolio'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'portfolio'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            # Pool de connexions de Django 5.1+ (psycopg[pool]) ; incompatible avec CONN_MAX_AGE
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX', 10)),
+                },
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Verrou d'écriture pris dès BEGIN : pas d'échec immédiat quand deux
+                # transactions lectrices veulent ensuite écrire (« database is locked »)
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,  # secondes d'attente du verrou
+            },
+        }
+    }
+
+# Mode WAL (lecteurs et écrivain ne se bloquent plus) : conservé dans le
+# fichier de la base, il est activé une fois par `manage.py migrate`
+# (migration 0016_sqlite_wal), pas à chaque connexion
+SQLITE_JOURNAL_MODE = 'WAL'
+# PRAGMA propres à chaque connexion SQLite (portfolio/signals.py)
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',      # fsync au checkpoint seulement (sûr en WAL)
+    'busy_timeout': 20000,        # ms
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,         # Kio
+}
+if os.environ.get('DJANGO_SQLITE_TUNING') == '0':
+    # Configuration SQLite d'origine (comparaison dans bench_db_concurrency)
+    SQLITE_JOURNAL_MODE = ''
+    SQLITE_PRAGMAS = {}
+    DATABASES['default'].pop('OPTIONS', None)
+
+
+# Cache (pages publiques, compteurs)
+# Cache fichier par défaut : partagé par tous les workers d'une même machine,
+# donc l'invalidation faite par un worker est vue par les autres.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+if os.environ.get('DJANGO_CACHE_BACKEND') == 'locmem':
+    # Un seul processus (développement) : cache mémoire
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'portfolio',
     }
+elif os.environ.get('DJANGO_CACHE_BACKEND') == 'dummy':
+    # Aucun cache (mesures de performance des vues)
+    CACHES['default'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+# Sessions : cache dédié, pour qu'une éviction du cache des pages ne
+# déconnecte pas les utilisateurs (profil 'cache' ci-dessous)
+CACHES['sessions'] = {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'), 'sessions'),
+    'OPTIONS': {'MAX_ENTRIES': 50000},
 }
+if os.environ.get('DJANGO_CACHE_BACKEND') == 'locmem':
+    CACHES['sessions'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sessions'}
+if sys.argv[1:2] == ['test']:
+    # manage.py test : caches mémoire du processus, jamais ceux du développeur
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+        'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-sessions'},
+    }
+
+# Profil sessions / messages flash, choisi par DJANGO_SESSION_PROFILE :
+# - 'db' : réglages d'origine (session lue en base à chaque requête)
+# - 'cached_db' : session lue depuis le cache, écrite aussi en base (défaut)
+# - 'cache' : session uniquement en cache, aucune requête SQL
+# Hors 'db', les messages flash vivent dans un cookie signé et ne touchent
+# jamais la session. Sessions expirées : manage.py purge_sessions.
+SESSION_PROFILES = {
+    'db': ('django.contrib.sessions.backends.db', 'django.contrib.messages.storage.fallback.FallbackStorage'),
+    'cached_db': ('django.contrib.sessions.backends.cached_db', 'django.contrib.messages.storage.cookie.CookieStorage'),
+    'cache': ('django.contrib.sessions.backends.cache', 'django.contrib.messages.storage.cookie.CookieStorage'),
+}
+SESSION_PROFILE = os.environ.get('DJANGO_SESSION_PROFILE', 'cached_db')
+SESSION_ENGINE, MESSAGE_STORAGE = SESSION_PROFILES[SESSION_PROFILE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Fragments de template (cartes, commentaires) : clés versionnées, voir portfolio/fragments.py
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 
@@ -130,6 +248,18 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Noms de fichiers avec empreinte du contenu (cache navigateur longue durée)
+STORAGES = {
+    'default': {'BACKEND': 'portfolio.storage.HashedMediaStorage'},
+    # Noms avec empreinte + variantes .gz/.br écrites par collectstatic
+    'staticfiles': {'BACKEND': 'portfolio.storage.PrecompressedManifestStorage'},
+}
+
+# Service des médias (voir portfolio/mediafiles.py) : 'python', 'nginx'
+# (X-Accel-Redirect vers MEDIA_ACCEL_PREFIX) ou 'sendfile' (X-Sendfile)
+MEDIA_SERVE_BACKEND = os.environ.get('DJANGO_MEDIA_SERVE_BACKEND', 'python')
+MEDIA_ACCEL_PREFIX = os.environ.get('DJANGO_MEDIA_ACCEL_PREFIX', '/protected-media/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -138,4 +268,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Login URLs
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
-LOGOUT_REDIRECT_URL = 'home'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'home'
+
+# Mesures de performance (portfolio/instrumentation.py)
+PERF_SAMPLE_SIZE = 5000  # dernières requêtes gardées pour les percentiles
+# Jeton « Authorization: Bearer » du scraper Prometheus sur /metrics
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+
+# Limitation de débit des écritures (portfolio/ratelimit.py, limites dans portfolio/urls.py)
+RATE_LIMIT_ENABLED = os.environ.get('DJANGO_RATE_LIMIT', '1') != '0'
+RATE_LIMIT_CACHE = 'default'  # DummyCache : repli sur un état en mémoire par processus
+# En-tête portant l'adresse du client derrière un proxy (ex. 'X-Real-IP'), sinon REMOTE_ADDR
+RATE_LIMIT_IP_HEADER = os.environ.get('DJANGO_RATE_LIMIT_IP_HEADER', '')
@@ -1,15 +1,11 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from django.views.generic import TemplateView
-from django.contrib.sitemaps.views import sitemap
-from portfolio.sitemaps import StaticViewSitemap, PostSitemap  # استيراد السايت ماب الجديد
-
-sitemaps = {
-    'static': StaticViewSitemap,
-    'posts': PostSitemap,
-}
+from portfolio import instrumentation, mediafiles, sitemaps
+from portfolio.conditional import conditional_page, listing_validators
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -20,11 +16,17 @@ urlpatterns = [
         template_name="robots.txt", content_type='text/plain'
     )),
 
-    # sitemap.xml
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django-sitemap'),
-]
+    # sitemap.xml (index) et ses sections découpées en tranches
+    path('sitemap.xml', conditional_page(listing_validators)(sitemaps.index), name='django-sitemap'),
+    path('sitemap-<section>.xml', conditional_page(listing_validators)(sitemaps.section),
+         name='sitemap_section'),
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Mesures au format Prometheus (voir portfolio/instrumentation.py)
+    path('metrics', instrumentation.metrics, name='metrics'),
+]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Médias : Range, cache longue durée, délégation possible à nginx/Apache
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), mediafiles.serve, name='media'),
+    ]
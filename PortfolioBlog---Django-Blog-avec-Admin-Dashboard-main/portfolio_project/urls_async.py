@@ -0,0 +1,26 @@
+"""URLs du déploiement ASGI : pages publiques en vues async, le reste inchangé"""
+import re
+
+from django.conf import settings
+from django.urls import path, re_path
+
+from portfolio import async_views, mediafiles, ratelimit
+from portfolio.urls import RATE_LIMITS
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('', async_views.home, name='home'),
+    path('blog/', async_views.blog, name='blog'),
+    path('post/<int:pk>/', async_views.post_detail, name='post_detail'),
+    path('download-cv/', async_views.download_cv, name='download_cv'),
+]
+
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), mediafiles.aserve, name='media'),
+    ]
+
+ratelimit.apply(urlpatterns, RATE_LIMITS)
+
+# Premières routes trouvées : les versions async ci-dessus masquent les vues sync
+urlpatterns += sync_urlpatterns
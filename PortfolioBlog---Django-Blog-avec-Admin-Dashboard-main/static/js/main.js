@@ -366,4 +366,17 @@ window.addEventListener('error', function(e) {
             typedElement.textContent = 'Bonjour, je suis Othmane Chaikhi';
         }
     }
-});
\ No newline at end of file
+});
+// YouTube facades: the iframe is only loaded when the visitor clicks the thumbnail
+document.addEventListener('click', function(e) {
+    const facade = e.target.closest('.video-facade');
+    if (!facade) return;
+    const iframe = document.createElement('iframe');
+    iframe.src = facade.dataset.embedUrl + '?autoplay=1';
+    iframe.title = facade.dataset.title;
+    iframe.allow = 'autoplay; encrypted-media; picture-in-picture';
+    iframe.allowFullscreen = true;
+    iframe.className = 'w-100 h-100';
+    iframe.style.border = '0';
+    facade.replaceWith(iframe);
+});